@@ -0,0 +1,71 @@
+"""
+Benchmark optimasi itinerary (services/itinerary_service.py) pada package sintetis.
+
+Untuk setiap ukuran package, Place acak di sekitar satu kota dibuat lalu
+diukur waktu build_itinerary (matriks haversine + nearest-neighbor + 2-opt +
+pembagian hari) dan jarak total dibanding urutan asli dan nearest-neighbor saja.
+Tidak butuh Neo4j maupun model.
+
+Usage:
+    python benchmark_itinerary.py [--sizes 10 25 50 100 200] [--repeat 20] [--seed 42]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import config
+from services.itinerary_service import (
+    build_itinerary, haversine_matrix, nearest_neighbor_tour, optimize_order, path_length
+)
+
+# Sekitar Yogyakarta, radius ~30 km
+CENTER_LAT, CENTER_LON, SPREAD_DEG = -7.7956, 110.3695, 0.3
+
+
+def synthetic_places(n, rng):
+    lat = CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    lon = CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    minutes = rng.choice([30, 45, 60, 90, 120], n)
+    return [
+        {"id": i, "name": f"Place {i}", "lat": float(lat[i]), "long": float(lon[i]), "time_minutes": int(minutes[i])}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark optimasi itinerary package")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100, 200], help="Jumlah Place per package")
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah package acak per ukuran")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'places':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'input km':>9} | {'NN km':>8} | {'2-opt km':>8} | {'days':>5}")
+    print("-" * 70)
+
+    for n in args.sizes:
+        timings, input_km, nn_km, opt_km, days = [], [], [], [], []
+        for _ in range(args.repeat):
+            places = synthetic_places(n, rng)
+
+            started = time.perf_counter()
+            itinerary = build_itinerary(places, config.ITINERARY_DAY_MINUTES, config.ITINERARY_TRAVEL_SPEED_KMH)
+            timings.append((time.perf_counter() - started) * 1000)
+            days.append(len(itinerary["days"]))
+
+            # Kualitas urutan: jarak path penuh (termasuk perpindahan antar hari)
+            dist = haversine_matrix(np.array([p["lat"] for p in places]), np.array([p["long"] for p in places]))
+            input_km.append(path_length(np.arange(n), dist))
+            first = int(np.argmax(dist.sum(axis=1)))
+            nn_km.append(path_length(nearest_neighbor_tour(dist, first), dist))
+            opt_km.append(path_length(optimize_order(dist), dist))
+
+        print(
+            f"{n:>6} | {np.percentile(timings, 50):>8.2f} | {np.percentile(timings, 95):>8.2f} | "
+            f"{np.mean(input_km):>9.1f} | {np.mean(nn_km):>8.1f} | {np.mean(opt_km):>8.1f} | {np.mean(days):>5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
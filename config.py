@@ -13,4 +13,120 @@ except ImportError:
 
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
\ No newline at end of file
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+
+# === Wikidata enrichment cache ===
+WIKIDATA_CACHE_ENABLED = os.getenv("WIKIDATA_CACHE_ENABLED", "true").lower() == "true"
+WIKIDATA_CACHE_PATH = os.getenv("WIKIDATA_CACHE_PATH", "wikidata_cache.sqlite")
+WIKIDATA_CACHE_TTL = int(os.getenv("WIKIDATA_CACHE_TTL", str(7 * 24 * 3600)))
+WIKIDATA_CACHE_NEGATIVE_TTL = int(os.getenv("WIKIDATA_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+WIKIDATA_CACHE_ERROR_TTL = int(os.getenv("WIKIDATA_CACHE_ERROR_TTL", "300"))
+WIKIDATA_CACHE_MEMORY_SIZE = int(os.getenv("WIKIDATA_CACHE_MEMORY_SIZE", "2048"))
+WIKIDATA_CACHE_DISK_SIZE = int(os.getenv("WIKIDATA_CACHE_DISK_SIZE", "50000"))
+
+# === Wikidata enrichment concurrency ===
+WIKIDATA_TIMEOUT = int(os.getenv("WIKIDATA_TIMEOUT", "5"))
+WIKIDATA_ENRICH_DEADLINE = float(os.getenv("WIKIDATA_ENRICH_DEADLINE", "2.5"))
+WIKIDATA_MAX_CONCURRENCY = int(os.getenv("WIKIDATA_MAX_CONCURRENCY", "8"))
+# Batas task SPARQL yang antre + berjalan; di atas ini lookup baru dilewati (enrichment_partial)
+WIKIDATA_MAX_PENDING = int(os.getenv("WIKIDATA_MAX_PENDING", "32"))
+# "batch" = satu SPARQL request per chunk nama, "single" = satu request per tempat
+WIKIDATA_ENRICH_MODE = os.getenv("WIKIDATA_ENRICH_MODE", "batch").lower()
+WIKIDATA_BATCH_SIZE = int(os.getenv("WIKIDATA_BATCH_SIZE", "25"))
+# Umur maksimum (detik) data Wikidata yang disimpan di node Place oleh prefetch_wikidata.py
+WIKIDATA_STORED_TTL = int(os.getenv("WIKIDATA_STORED_TTL", str(30 * 24 * 3600)))
+
+# === Neo4j connection pool ===
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "10"))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "15"))
+# Jumlah record yang ditarik per round-trip Bolt
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+
+# === Query embedding cache ===
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+# === Inference micro-batching ===
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "true").lower() == "true"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+# Batas jumlah pasangan (query, document) per forward pass cross-encoder
+INFERENCE_MAX_BATCH_PAIRS = int(os.getenv("INFERENCE_MAX_BATCH_PAIRS", "256"))
+
+# === Reranking ===
+# Budget token deskripsi untuk /search/rerank-advanced (0 = tanpa truncation)
+RERANK_DESCRIPTION_MAX_TOKENS = int(os.getenv("RERANK_DESCRIPTION_MAX_TOKENS", "128"))
+RERANK_SCORE_CACHE_SIZE = int(os.getenv("RERANK_SCORE_CACHE_SIZE", "50000"))
+
+# === Model inference backend ===
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# torch | torch-int8 | onnx | onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "torch").lower()
+# arm64 | avx2 | avx512 | avx512_vnni
+ONNX_QUANTIZATION = os.getenv("ONNX_QUANTIZATION", "avx2").lower()
+MODEL_EXPORT_DIR = os.getenv("MODEL_EXPORT_DIR", "model_exports")
+
+# === Model lifecycle ===
+# eager = load bobot saat import (sebelum fork), lazy = load saat pertama dipakai / saat warm-up
+MODEL_LOADING = os.getenv("MODEL_LOADING", "eager").lower()
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+
+# === Inference process pool ===
+# inline = model jalan di proses API, process = model jalan di process pool terpisah
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "inline").lower()
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "1"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+INFERENCE_QUEUE_TIMEOUT = float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "10"))
+# Jumlah thread torch per proses inference (0 = default torch)
+INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))
+
+# === Vector search ===
+# neo4j = db.index.vector.queryNodes, local = in-process NumPy index (services/vector_index.py)
+VECTOR_SEARCH_BACKEND = os.getenv("VECTOR_SEARCH_BACKEND", "neo4j").lower()
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index/places")
+VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "300"))
+# Konstanta k reciprocal rank fusion untuk /search/hybrid
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Filtered semantic search: faktor over-fetch ANN, batas kandidat, TTL cache id yang lolos filter (index lokal)
+VECTOR_FILTER_OVERFETCH = int(os.getenv("VECTOR_FILTER_OVERFETCH", "4"))
+VECTOR_FILTER_MAX_CANDIDATES = int(os.getenv("VECTOR_FILTER_MAX_CANDIDATES", "1000"))
+VECTOR_FILTER_CACHE_TTL = float(os.getenv("VECTOR_FILTER_CACHE_TTL", "60"))
+
+# === Geo search (/places/nearby) ===
+# k-nearest tanpa radius: radius awal yang diperbesar 2x sampai cukup hasil atau NEARBY_MAX_RADIUS_KM
+NEARBY_INITIAL_RADIUS_KM = float(os.getenv("NEARBY_INITIAL_RADIUS_KM", "5"))
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "200"))
+# Jumlah Place terdekat yang di-ranking ulang secara semantic jika ada `query`
+NEARBY_SEMANTIC_POOL = int(os.getenv("NEARBY_SEMANTIC_POOL", "100"))
+
+# === Response cache (/places/{id}, /infobox/{id}, /packages, /packages/{id}) ===
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# memory = LRU per proses, redis = dipakai bersama semua worker (butuh package redis)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# max-age di header Cache-Control untuk browser / CDN (revalidasi via ETag setelahnya)
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+# Seberapa sering worker membaca generation invalidation dari Neo4j
+RESPONSE_CACHE_GENERATION_POLL = float(os.getenv("RESPONSE_CACHE_GENERATION_POLL", "5"))
+# Token untuk POST /cache/invalidate (kosong = endpoint nonaktif)
+CACHE_INVALIDATION_TOKEN = os.getenv("CACHE_INVALIDATION_TOKEN", "")
+
+# === Request coalescing ===
+# Search identik yang sedang berjalan berbagi satu komputasi (single-flight)
+SEARCH_COALESCING = os.getenv("SEARCH_COALESCING", "true").lower() == "true"
+
+# === Batch lookup (/places/batch, /infobox/batch) ===
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+
+# === Itinerary (/packages/{id}/itinerary) ===
+# Budget waktu per hari (menit), kecepatan rata-rata perjalanan antar Place (km/jam)
+ITINERARY_DAY_MINUTES = int(os.getenv("ITINERARY_DAY_MINUTES", "480"))
+ITINERARY_TRAVEL_SPEED_KMH = float(os.getenv("ITINERARY_TRAVEL_SPEED_KMH", "30"))
+# Durasi kunjungan untuk Place tanpa time_minutes
+ITINERARY_DEFAULT_VISIT_MINUTES = int(os.getenv("ITINERARY_DEFAULT_VISIT_MINUTES", "60"))
+# Batas jumlah pass perbaikan 2-opt
+ITINERARY_TWO_OPT_MAX_PASSES = int(os.getenv("ITINERARY_TWO_OPT_MAX_PASSES", "50"))
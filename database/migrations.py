@@ -0,0 +1,88 @@
+"""
+Migrasi schema Neo4j (index, constraint) yang dibutuhkan API.
+
+Setiap migrasi punya nama unik dan dijalankan sekali, berurutan. Migrasi
+yang sudah jalan dicatat sebagai node (:Migration {name, applied_at}).
+Statement memakai IF NOT EXISTS / SET idempotent sehingga aman dijalankan
+ulang, dan dijalankan sebagai auto-commit query (dibutuhkan oleh
+CALL { ... } IN TRANSACTIONS).
+
+p.location diturunkan dari p.lat / p.long; sync_place_locations() menyamakannya
+lagi setelah setiap load data (migrate.py dan embedding.py menjalankannya).
+"""
+from typing import List, Tuple
+
+# Set / hapus p.location hanya pada Place yang point-nya tidak cocok lagi dengan lat/long
+SYNC_PLACE_LOCATIONS = """
+MATCH (p:Place)
+WITH p,
+     CASE WHEN p.lat IS NULL OR p.long IS NULL THEN null
+          ELSE point({latitude: toFloat(p.lat), longitude: toFloat(p.long)}) END AS location
+WHERE NOT (p.location IS NULL AND location IS NULL)
+  AND (p.location IS NULL OR location IS NULL OR p.location <> location)
+CALL {
+    WITH p, location
+    SET p.location = location
+} IN TRANSACTIONS OF 1000 ROWS
+RETURN count(p) AS updated
+"""
+
+# (nama, daftar statement Cypher) - tambahkan migrasi baru di akhir list
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_place_fulltext_index", [
+        """
+        CREATE FULLTEXT INDEX place_fulltext_index IF NOT EXISTS
+        FOR (p:Place) ON EACH [p.name, p.description, p.city, p.category]
+        """,
+    ]),
+    ("0002_place_location_point_index", [
+        # Properti point dari lat/long, untuk /places/nearby
+        SYNC_PLACE_LOCATIONS,
+        """
+        CREATE POINT INDEX place_location_index IF NOT EXISTS
+        FOR (p:Place) ON (p.location)
+        """,
+    ]),
+]
+
+
+def applied_migrations(conn) -> List[str]:
+    rows = conn.read("MATCH (m:Migration) RETURN m.name AS name ORDER BY m.name")
+    return [row["name"] for row in rows]
+
+
+def pending_migrations(conn) -> List[Tuple[str, List[str]]]:
+    done = set(applied_migrations(conn))
+    return [(name, statements) for name, statements in MIGRATIONS if name not in done]
+
+
+def run_migrations(conn) -> List[str]:
+    """
+    Apply all pending migrations in order.
+
+    Returns:
+        Names of the migrations that were applied
+    """
+    applied = []
+    for name, statements in pending_migrations(conn):
+        for statement in statements:
+            # Schema command tidak boleh dicampur dengan write data dalam satu transaksi
+            conn.query(statement)
+        conn.write(
+            "MERGE (m:Migration {name: $name}) SET m.applied_at = datetime()",
+            {"name": name}
+        )
+        applied.append(name)
+    return applied
+
+
+def sync_place_locations(conn) -> int:
+    """
+    Bring p.location in line with p.lat / p.long for Places added or moved since
+    the last sync. Idempotent; only mismatched Places are written.
+
+    Returns:
+        Number of Places whose location was set or removed
+    """
+    rows = conn.query(SYNC_PLACE_LOCATIONS)
+    return rows[0]["updated"] if rows else 0
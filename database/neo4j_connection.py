@@ -1,6 +1,26 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase, READ_ACCESS, WRITE_ACCESS
 import config
 
+
+def _driver_options():
+    return {
+        "max_connection_lifetime": 3600,
+        "keep_alive": True,
+        "max_connection_pool_size": config.NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": config.NEO4J_ACQUISITION_TIMEOUT,
+        "connection_timeout": config.NEO4J_CONNECTION_TIMEOUT
+    }
+
+
+def _collect(tx, cypher, params):
+    return [record.data() for record in tx.run(cypher, params)]
+
+
+async def _collect_async(tx, cypher, params):
+    result = await tx.run(cypher, params)
+    return [record.data() async for record in result]
+
+
 class Neo4jConnection:
     def __init__(self):
         # neo4j+s:// URI scheme handles SSL/TLS automatically
@@ -8,13 +28,96 @@ class Neo4jConnection:
         self.driver = GraphDatabase.driver(
             config.NEO4J_URI,
             auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
-            max_connection_lifetime=3600,
-            keep_alive=True
+            **_driver_options()
+        )
+
+    def _session(self, access_mode=WRITE_ACCESS, fetch_size=None):
+        return self.driver.session(
+            default_access_mode=access_mode,
+            fetch_size=fetch_size or config.NEO4J_FETCH_SIZE
         )
 
     def query(self, cypher, params=None):
-        with self.driver.session() as session:
+        """Auto-commit query (no routing hints, no retry)."""
+        with self._session() as session:
             result = session.run(cypher, params or {})
             return [record.data() for record in result]
 
-neo4j = Neo4jConnection()
\ No newline at end of file
+    def read(self, cypher, params=None, fetch_size=None):
+        """
+        Run a read query in a managed transaction. Routed to read replicas
+        on a cluster and retried by the driver on transient errors.
+        """
+        with self._session(READ_ACCESS, fetch_size) as session:
+            return session.execute_read(_collect, cypher, params or {})
+
+    def write(self, cypher, params=None):
+        """Run a write query in a managed transaction with driver retries."""
+        with self._session(WRITE_ACCESS) as session:
+            return session.execute_write(_collect, cypher, params or {})
+
+    def stream(self, cypher, params=None, fetch_size=None):
+        """
+        Yield records lazily, pulling `fetch_size` records per round-trip
+        instead of buffering the whole result. Not retried, since a partially
+        consumed stream cannot be replayed.
+        """
+        with self._session(READ_ACCESS, fetch_size) as session:
+            for record in session.run(cypher, params or {}):
+                yield record.data()
+
+
+class AsyncNeo4jConnection:
+    """
+    Async counterpart of Neo4jConnection for the API request path.
+
+    Queries await Bolt I/O on the event loop instead of pinning a threadpool
+    thread, so concurrency is bounded by the connection pool
+    (NEO4J_MAX_POOL_SIZE) rather than the number of worker threads. When the
+    pool is exhausted, callers wait up to NEO4J_ACQUISITION_TIMEOUT seconds
+    for a free connection.
+    """
+
+    def __init__(self):
+        self.driver = AsyncGraphDatabase.driver(
+            config.NEO4J_URI,
+            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
+            **_driver_options()
+        )
+
+    def _session(self, access_mode=WRITE_ACCESS, fetch_size=None):
+        return self.driver.session(
+            default_access_mode=access_mode,
+            fetch_size=fetch_size or config.NEO4J_FETCH_SIZE
+        )
+
+    async def query(self, cypher, params=None):
+        """Auto-commit query (no routing hints, no retry)."""
+        async with self._session() as session:
+            result = await session.run(cypher, params or {})
+            return [record.data() async for record in result]
+
+    async def read(self, cypher, params=None, fetch_size=None):
+        """Managed read transaction, see Neo4jConnection.read."""
+        async with self._session(READ_ACCESS, fetch_size) as session:
+            return await session.execute_read(_collect_async, cypher, params or {})
+
+    async def write(self, cypher, params=None):
+        """Managed write transaction, see Neo4jConnection.write."""
+        async with self._session(WRITE_ACCESS) as session:
+            return await session.execute_write(_collect_async, cypher, params or {})
+
+    async def stream(self, cypher, params=None, fetch_size=None):
+        """Async generator yielding records lazily, see Neo4jConnection.stream."""
+        async with self._session(READ_ACCESS, fetch_size) as session:
+            result = await session.run(cypher, params or {})
+            async for record in result:
+                yield record.data()
+
+    async def close(self):
+        await self.driver.close()
+
+
+# Sync connection dipakai oleh script batch (embedding, prefetch), async untuk API
+neo4j = Neo4jConnection()
+async_neo4j = AsyncNeo4jConnection()
@@ -1,47 +1,209 @@
-from sentence_transformers import SentenceTransformer
-from neo4j import GraphDatabase
+"""
+Pipeline embedding Place: baca per halaman, encode per batch, tulis balik dengan UNWIND.
 
-# === Load Model ===
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+Setiap Place menyimpan:
+    embedding, embedding_hash, embedding_model, embedding_updated_at
 
-# === Koneksi Neo4j ===
-uri = "neo4j://localhost:7687"
-user = "neo4j"
-password = "takturisturislohmas"
+embedding_hash adalah hash dari teks yang di-embed + nama model, sehingga
+run berikutnya hanya meng-encode Place yang teksnya (atau modelnya) berubah.
+Progress disimpan di file checkpoint setelah setiap halaman; jika run gagal,
+run berikutnya melanjutkan dari halaman terakhir yang sudah tersimpan, dengan
+mode --force yang sama seperti run yang terputus.
 
-driver = GraphDatabase.driver(uri, auth=(user, password))
+Vector index place_embedding_index dibuat jika belum ada dan divalidasi
+(dimensi + similarity function) terhadap model yang dipakai.
 
-# === Ambil seluruh Place dari Neo4j ===
-def get_all_places(tx):
-    result = tx.run("""
+Usage:
+    python embedding.py [--force] [--restart] [--page-size 1000] [--batch-size 128] [--recreate-index]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import config
+from database.migrations import sync_place_locations
+from database.neo4j_connection import neo4j
+from services.response_cache import invalidate_response_cache
+
+VECTOR_INDEX_NAME = "place_embedding_index"
+DEFAULT_CHECKPOINT = "embedding_checkpoint.json"
+
+
+def embedding_text(place):
+    # Teks yang di-embed; harus sama dengan yang dipakai search (nama Place)
+    return place["name"] or ""
+
+
+def content_hash(text, model_name):
+    return hashlib.blake2b(f"{model_name}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_places_page(after_id, page_size):
+    return neo4j.read(
+        """
         MATCH (p:Place)
-        RETURN p.id AS id, p.name AS name
+        WHERE $after IS NULL OR p.id > $after
+        RETURN p.id AS id, p.name AS name, p.embedding_hash AS embedding_hash,
+               p.embedding IS NOT NULL AS has_embedding
+        ORDER BY p.id
+        LIMIT $limit
+        """,
+        {"after": after_id, "limit": page_size}
+    )
+
+
+def save_embeddings(rows):
+    neo4j.write(
+        """
+        UNWIND $rows AS row
+        MATCH (p:Place {id: row.id})
+        SET p.embedding = row.embedding,
+            p.embedding_hash = row.hash,
+            p.embedding_model = $model,
+            p.embedding_updated_at = timestamp()
+        """,
+        {"rows": rows, "model": config.EMBEDDING_MODEL_NAME}
+    )
+
+
+def ensure_vector_index(dimensions, recreate=False):
+    """Create place_embedding_index, or check that the existing one matches the model."""
+    indexes = neo4j.query(
+        "SHOW VECTOR INDEXES YIELD name, options WHERE name = $name RETURN options",
+        {"name": VECTOR_INDEX_NAME}
+    )
+
+    if indexes:
+        index_config = indexes[0]["options"].get("indexConfig", {})
+        actual = (index_config.get("vector.dimensions"), str(index_config.get("vector.similarity_function", "")).lower())
+        if actual == (dimensions, "cosine"):
+            print(f"✓ Vector index {VECTOR_INDEX_NAME} valid ({dimensions} dim, cosine)")
+            return
+        if not recreate:
+            sys.exit(
+                f"✗ Vector index {VECTOR_INDEX_NAME} tidak cocok dengan model: {actual}, "
+                f"butuh ({dimensions}, 'cosine'). Jalankan ulang dengan --recreate-index"
+            )
+        neo4j.query(f"DROP INDEX {VECTOR_INDEX_NAME}")
+        print(f"✓ Vector index lama {VECTOR_INDEX_NAME} di-drop")
+
+    # Options index tidak bisa diparameterisasi, dimensions selalu int dari model
+    neo4j.query(f"""
+        CREATE VECTOR INDEX {VECTOR_INDEX_NAME} IF NOT EXISTS
+        FOR (p:Place) ON (p.embedding)
+        OPTIONS {{indexConfig: {{
+            `vector.dimensions`: {int(dimensions)},
+            `vector.similarity_function`: 'cosine'
+        }}}}
     """)
-    return result.data()
+    print(f"✓ Vector index {VECTOR_INDEX_NAME} dibuat ({dimensions} dim, cosine)")
+
+
+def load_checkpoint(path):
+    """Returns (after_id, force) of the interrupted run, or None."""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Checkpoint dari model lain tidak berlaku
+    if checkpoint.get("model") != config.EMBEDDING_MODEL_NAME:
+        return None
+    return checkpoint.get("after_id"), bool(checkpoint.get("force", False))
+
+
+def save_checkpoint(path, after_id, force):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"model": config.EMBEDDING_MODEL_NAME, "after_id": after_id, "force": force}, f)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat / perbarui embedding untuk semua Place")
+    parser.add_argument("--force", action="store_true", help="Encode ulang semua Place, termasuk yang tidak berubah")
+    parser.add_argument("--restart", action="store_true", help="Abaikan checkpoint dan mulai dari awal")
+    parser.add_argument("--page-size", type=int, default=1000, help="Jumlah Place per halaman Neo4j (dan per write)")
+    parser.add_argument("--batch-size", type=int, default=128, help="Batch size encode model")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File checkpoint untuk resume")
+    parser.add_argument("--recreate-index", action="store_true", help="Drop dan buat ulang vector index jika tidak cocok")
+    args = parser.parse_args()
+
+    # Script batch: model dijalankan langsung di proses ini, tanpa process pool / micro-batching
+    config.INFERENCE_MODE = "inline"
+    config.INFERENCE_BATCHING = False
+    from services.embedding_service import get_embedding_model
+
+    model = get_embedding_model()
+    ensure_vector_index(model.get_sentence_embedding_dimension(), args.recreate_index)
+
+    after_id, force = None, args.force
+    checkpoint = None if args.restart else load_checkpoint(args.checkpoint)
+    if checkpoint is not None:
+        after_id, force = checkpoint
+        print(f"↻ Melanjutkan dari Place id > {after_id}")
+        # Sisa halaman harus diproses dengan mode yang sama, kalau tidak run --force yang
+        # terputus diam-diam jadi run biasa (atau sebaliknya)
+        if force != args.force:
+            print(f"↻ Checkpoint dibuat {'dengan' if force else 'tanpa'} --force, mode itu dipakai; "
+                  f"gunakan --restart untuk mulai dari awal")
+
+    scanned, encoded, skipped = 0, 0, 0
+    started = time.time()
+
+    while True:
+        places = get_places_page(after_id, args.page_size)
+        if not places:
+            break
+
+        rows, texts = [], []
+        for place in places:
+            text = embedding_text(place)
+            digest = content_hash(text, config.EMBEDDING_MODEL_NAME)
+            if not force and place["has_embedding"] and place["embedding_hash"] == digest:
+                skipped += 1
+                continue
+            rows.append({"id": place["id"], "hash": digest})
+            texts.append(text)
 
-# === Insert embedding kembali ke Neo4j ===
-def save_embedding(tx, id_value, embedding):
-    tx.run("""
-        MATCH (p:Place {id: $id})
-        SET p.embedding = $embedding
-    """, id=id_value, embedding=embedding)
+        if rows:
+            embeddings = model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True)
+            for row, embedding in zip(rows, embeddings):
+                row["embedding"] = embedding.astype(float).tolist()
+            save_embeddings(rows)
 
-# === Pipeline: Ambil > Buat Embedding > Simpan ===
-with driver.session() as session:
+        # Checkpoint baru ditulis setelah write halaman ini sukses
+        after_id = places[-1]["id"]
+        save_checkpoint(args.checkpoint, after_id, force)
 
-    # gunakan execute_read di Neo4j Driver 5+
-    places = session.execute_read(get_all_places)
+        scanned += len(places)
+        encoded += len(rows)
+        elapsed = time.time() - started
+        print(
+            f"✓ {scanned} Place diproses, {encoded} di-encode, {skipped} tidak berubah "
+            f"({scanned / elapsed:.1f} place/s, {encoded / elapsed:.1f} encode/s)"
+        )
 
-    print(f"Jumlah data ditemukan: {len(places)}")
+    # Selesai: checkpoint tidak dibutuhkan lagi, run berikutnya cukup skip lewat hash
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
 
-    for place in places:
-        text = place["name"]
-        emb = model.encode(text).tolist()
+    neo4j.query("CALL db.awaitIndex($name, 600)", {"name": VECTOR_INDEX_NAME})
+    # Place baru / pindah dari import terakhir: location untuk /places/nearby
+    located = sync_place_locations(neo4j)
+    if located:
+        print(f"✓ Location {located} Place disinkronkan")
+    if encoded:
+        print(f"✓ Response cache API di-invalidate (generation {invalidate_response_cache(neo4j)})")
+    neo4j.driver.close()
 
-        # gunakan execute_write di driver baru
-        session.execute_write(save_embedding, place["id"], emb)
+    elapsed = time.time() - started
+    rate = scanned / elapsed if elapsed > 0 else 0.0
+    print(f"Selesai membuat embedding! {encoded} di-encode, {skipped} dilewati, {elapsed:.1f}s ({rate:.1f} place/s)")
 
-        print(f"✓ Embedding dibuat untuk Place {place['id']}")
 
-driver.close()
-print("Selesai membuat embedding!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Export model embedding & cross-encoder ke ONNX (fp32 dan dynamic int8), lalu
+verifikasi bahwa ranking dari setiap backend tetap sejalan dengan baseline
+PyTorch fp32.
+
+Hasil export disimpan di MODEL_EXPORT_DIR dan otomatis dipakai saat
+EMBEDDING_BACKEND / RERANK_BACKEND di-set ke "onnx" atau "onnx-int8".
+
+Usage:
+    python export_models.py [--skip-export] [--from-neo4j] [--top-k 5] [--min-agreement 0.8]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import config
+from services.model_backend import BACKENDS, export_path, load_cross_encoder, load_sentence_transformer
+
+SAMPLE_QUERIES = [
+    "pantai bali",
+    "museum jakarta",
+    "tempat wisata alam dengan air terjun",
+    "pantai yang bagus untuk snorkeling",
+    "museum sejarah di Jakarta",
+    "taman bermain anak",
+    "wisata kuliner bandung",
+    "candi bersejarah di yogyakarta",
+]
+
+SAMPLE_DOCUMENTS = [
+    "Pantai Kuta", "Pantai Pandawa", "Pantai Parangtritis", "Museum Fatahillah",
+    "Museum Nasional", "Monumen Nasional", "Kota Tua", "Curug Cimahi",
+    "Air Terjun Gitgit", "Taman Mini Indonesia Indah", "Dunia Fantasi",
+    "Candi Prambanan", "Candi Borobudur", "Kawah Putih", "Pasar Baru Bandung",
+    "Kebun Raya Bogor", "Pulau Seribu", "Gili Trawangan", "Tangkuban Perahu",
+    "Museum Geologi", "Keraton Yogyakarta", "Jalan Braga", "Ancol Dreamland",
+]
+
+
+def load_documents(from_neo4j: bool, limit: int):
+    if not from_neo4j:
+        return SAMPLE_DOCUMENTS
+    from database.neo4j_connection import neo4j
+    rows = neo4j.read("MATCH (p:Place) RETURN p.name AS name ORDER BY p.id LIMIT $limit", {"limit": limit})
+    return [row["name"] for row in rows if row["name"]]
+
+
+def export(model_name: str, loader, quantization: str):
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = export_path(model_name)
+    print(f"→ Export {model_name} ke {path}")
+    onnx_model = loader(model_name, "onnx")
+    onnx_model.save(path)
+    export_dynamic_quantized_onnx_model(onnx_model, quantization, path)
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra = np.argsort(np.argsort(a)).astype(np.float64)
+    rb = np.argsort(np.argsort(b)).astype(np.float64)
+    ra -= ra.mean()
+    rb -= rb.mean()
+    denom = np.sqrt((ra ** 2).sum() * (rb ** 2).sum())
+    return float((ra * rb).sum() / denom) if denom else 1.0
+
+
+def embedding_scores(model, queries, documents):
+    q = np.asarray(model.encode(queries, normalize_embeddings=True))
+    d = np.asarray(model.encode(documents, normalize_embeddings=True))
+    return q @ d.T
+
+
+def rerank_scores(model, queries, documents):
+    pairs = [[q, doc] for q in queries for doc in documents]
+    return np.asarray(model.predict(pairs)).reshape(len(queries), len(documents))
+
+
+def compare(baseline: np.ndarray, candidate: np.ndarray, top_k: int):
+    """Rata-rata overlap top-k dan Spearman korelasi ranking per query."""
+    overlaps, correlations = [], []
+    for base_row, cand_row in zip(baseline, candidate):
+        base_top = set(np.argsort(-base_row)[:top_k])
+        cand_top = set(np.argsort(-cand_row)[:top_k])
+        overlaps.append(len(base_top & cand_top) / top_k)
+        correlations.append(spearman(base_row, cand_row))
+    return float(np.mean(overlaps)), float(np.mean(correlations))
+
+
+def verify(label, model_name, loader, scorer, queries, documents, top_k, min_agreement):
+    print(f"\n=== {label}: {model_name} ===")
+    baseline_model = loader(model_name, "torch")
+    baseline = scorer(baseline_model, queries, documents)
+    ok = True
+
+    for backend in BACKENDS:
+        try:
+            model = baseline_model if backend == "torch" else loader(model_name, backend)
+        except Exception as e:
+            print(f"  {backend:<11} ✗ gagal load: {e}")
+            ok = False
+            continue
+
+        started = time.perf_counter()
+        scores = scorer(model, queries, documents)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        overlap, rho = compare(baseline, scores, top_k)
+        passed = overlap >= min_agreement
+        ok = ok and passed
+        print(
+            f"  {backend:<11} {'✓' if passed else '✗'} top-{top_k} overlap {overlap:.3f}  "
+            f"spearman {rho:.3f}  {elapsed_ms:.1f} ms"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export & verifikasi inference backend model")
+    parser.add_argument("--skip-export", action="store_true", help="Langsung verifikasi tanpa export ulang")
+    parser.add_argument("--from-neo4j", action="store_true", help="Pakai nama Place dari Neo4j sebagai dokumen uji")
+    parser.add_argument("--limit", type=int, default=200, help="Jumlah Place yang diambil dari Neo4j")
+    parser.add_argument("--top-k", type=int, default=5, help="k untuk top-k overlap")
+    parser.add_argument("--min-agreement", type=float, default=0.8, help="Minimal top-k overlap agar lolos")
+    parser.add_argument("--quantization", default=config.ONNX_QUANTIZATION, help="arm64 | avx2 | avx512 | avx512_vnni")
+    args = parser.parse_args()
+    # Verifikasi onnx-int8 harus memakai file quantization yang sama dengan yang di-export
+    config.ONNX_QUANTIZATION = args.quantization
+
+    if not args.skip_export:
+        export(config.EMBEDDING_MODEL_NAME, load_sentence_transformer, args.quantization)
+        export(config.RERANK_MODEL_NAME, load_cross_encoder, args.quantization)
+
+    documents = load_documents(args.from_neo4j, args.limit)
+    top_k = min(args.top_k, len(documents))
+
+    ok = verify("Embedding", config.EMBEDDING_MODEL_NAME, load_sentence_transformer, embedding_scores,
+                SAMPLE_QUERIES, documents, top_k, args.min_agreement)
+    ok = verify("Reranker", config.RERANK_MODEL_NAME, load_cross_encoder, rerank_scores,
+                SAMPLE_QUERIES, documents, top_k, args.min_agreement) and ok
+
+    print("\nSemua backend lolos verifikasi." if ok else "\nAda backend yang tidak lolos verifikasi.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# Konfigurasi gunicorn untuk deployment multi-worker.
+#
+# preload_app mengimport main:app sekali di master. Dengan MODEL_LOADING=eager
+# bobot model ikut di-load di master sebelum fork, sehingga semua worker
+# berbagi memory model secara copy-on-write. Warm-up inference tetap
+# dijalankan per worker (lifespan di main.py) karena thread pool torch tidak
+# aman dibuat sebelum fork.
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+accesslog = "-"
+
+
+def when_ready(server):
+    # Pindahkan object hasil preload ke generasi permanen supaya GC di worker
+    # tidak menulis ke page tersebut (menjaga sharing copy-on-write)
+    gc.freeze()
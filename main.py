@@ -1,12 +1,49 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from routers import search, infobox, query_console, packages, places
+from database.neo4j_connection import async_neo4j, neo4j
+from services import inference_pool, vector_index
+from services.model_registry import registry
+import asyncio
+import config
+import hmac
 import os
 import uvicorn
 
+# Eager: bobot model di-load saat import, sebelum gunicorn (preload_app) fork worker,
+# sehingga semua worker berbagi memory model secara copy-on-write.
+# Hanya saat di-import sebagai module app ("main:app"): `python main.py` menjalankan file
+# ini sebagai __main__ lalu meng-import main:app lagi, dan proses inference pool (spawn)
+# meng-import ulang file ini sebagai __mp_main__ - keduanya tidak perlu bobot model.
+if config.MODEL_LOADING == "eager" and __name__ not in ("__main__", "__mp_main__"):
+    registry.preload()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load (dan warm-up dummy encode/predict jika MODEL_WARMUP) di background per worker;
+    # /ready hijau setelah selesai, juga saat MODEL_LOADING=lazy
+    warmup = asyncio.create_task(asyncio.to_thread(registry.warm_up, config.MODEL_WARMUP))
+    # Index vector lokal: load snapshot / build, lalu refresh incremental secara periodik
+    refresher = None
+    if config.VECTOR_SEARCH_BACKEND == "local":
+        refresher = asyncio.create_task(
+            vector_index.keep_fresh(neo4j, config.VECTOR_INDEX_REFRESH_SECONDS)
+        )
+    yield
+    for task in (warmup, refresher):
+        if task is not None and not task.done():
+            task.cancel()
+    inference_pool.shutdown()
+    await async_neo4j.close()
+
+
 app = FastAPI(
     title="Lancong Backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -15,8 +52,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, OPTIONS, etc.)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],  # Cursor pagination dibaca dari header oleh frontend
 )
 
+@app.exception_handler(inference_pool.InferenceBusyError)
+async def inference_busy_handler(request: Request, exc: inference_pool.InferenceBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 app.include_router(search.router)
 app.include_router(infobox.router)
 app.include_router(query_console.router)
@@ -35,6 +77,26 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: hijau hanya setelah semua model selesai di-load (dan di-warm-up jika MODEL_WARMUP)"""
+    ready = registry.is_ready(require_warm=config.MODEL_WARMUP)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming_up", "models": registry.status()}
+    )
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(x_cache_token: str = Header(default="")):
+    """Invalidate the response cache in all workers (for ingest jobs that cannot import the app)"""
+    from services.response_cache import invalidate_response_cache_async
+    if not config.CACHE_INVALIDATION_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_cache_token, config.CACHE_INVALIDATION_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid cache token")
+    return {"status": "invalidated", "generation": await invalidate_response_cache_async()}
+
 
 @app.get("/debug/env")
 def debug_env():
@@ -62,15 +124,60 @@ def debug_config():
     }
 
 @app.get("/debug/neo4j-test")
-def test_neo4j():
+async def test_neo4j():
     """Test Neo4j connection"""
     try:
-        from database.neo4j_connection import neo4j
-        result = neo4j.query("RETURN 1 as test")
+        result = await async_neo4j.query("RETURN 1 as test")
         return {"status": "success", "connection": "working", "result": result}
     except Exception as e:
         return {"status": "error", "message": str(e), "type": type(e).__name__}
 
+@app.get("/debug/wikidata-cache")
+def wikidata_cache_stats():
+    """Hit/miss counters for the Wikidata enrichment cache and the live lookup queue"""
+    from services.wikidata import wikidata_fetch_stats
+    from services.wikidata_cache import get_wikidata_cache
+    cache = get_wikidata_cache()
+    if cache is None:
+        return {"enabled": False, "fetch": wikidata_fetch_stats()}
+    return {"enabled": True, **cache.stats(), "fetch": wikidata_fetch_stats()}
+
+@app.get("/debug/embedding-cache")
+def embedding_cache_stats():
+    """Hit/miss counters for the query embedding cache"""
+    from services.embedding_service import embedding_cache_stats
+    return embedding_cache_stats()
+
+@app.get("/debug/inference-batching")
+def inference_batching_stats():
+    """Batch counters for the encode / rerank micro-batchers"""
+    from services.embedding_service import encode_batcher_stats
+    from services.reranking_service import reranker_batcher_stats
+    return {"encode": encode_batcher_stats(), "rerank": reranker_batcher_stats()}
+
+@app.get("/debug/rerank-cache")
+def rerank_cache_stats():
+    """Hit/miss counters for the cross-encoder score cache"""
+    from services.reranking_service import rerank_score_cache_stats
+    return rerank_score_cache_stats()
+
+@app.get("/debug/search-coalescing")
+def search_coalescing_stats():
+    """How many concurrent identical searches shared one computation"""
+    from services.search_service import search_coalescing_stats
+    return search_coalescing_stats()
+
+@app.get("/debug/response-cache")
+def response_cache_stats():
+    """Hit/miss counters and generation of the response cache"""
+    from services.response_cache import response_cache_stats
+    return response_cache_stats()
+
+@app.get("/debug/vector-index")
+def vector_index_stats():
+    """Size and refresh state of the in-process vector index"""
+    return {"backend": config.VECTOR_SEARCH_BACKEND, **vector_index.vector_index.stats()}
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port)
@@ -0,0 +1,33 @@
+"""
+Jalankan migrasi schema Neo4j (lihat database/migrations.py), lalu sinkronkan
+p.location dengan lat/long. Aman dijalankan ulang setelah setiap import data.
+
+Usage:
+    python migrate.py [--list]
+"""
+import argparse
+
+from database.migrations import MIGRATIONS, applied_migrations, run_migrations, sync_place_locations
+from database.neo4j_connection import neo4j
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan migrasi schema Neo4j")
+    parser.add_argument("--list", action="store_true", help="Tampilkan status migrasi tanpa menjalankan")
+    args = parser.parse_args()
+
+    if args.list:
+        done = set(applied_migrations(neo4j))
+        for name, _ in MIGRATIONS:
+            print(f"[{'x' if name in done else ' '}] {name}")
+        return
+
+    applied = run_migrations(neo4j)
+    for name in applied:
+        print(f"✓ {name}")
+    print(f"Selesai: {len(applied)} migrasi dijalankan")
+    print(f"✓ Location {sync_place_locations(neo4j)} Place disinkronkan")
+
+
+if __name__ == "__main__":
+    main()
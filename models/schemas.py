@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+import config
+
+# Properti vector yang tidak pernah dikirim ke client
+VECTOR_FIELDS = frozenset({"embedding"})
 
 class Place(BaseModel):
     id: int
@@ -6,3 +10,35 @@ class Place(BaseModel):
     city: str | None = None
     category: str | None = None
     rating: float | None = None
+
+class PlaceFilter(BaseModel):
+    """Filter atribut Place untuk semantic search, diterapkan sebelum reranking."""
+    city: str | None = None
+    category: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    min_rating: float | None = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
+
+class PlaceResult(BaseModel):
+    """Place di hasil search. Score, enrichment dan properti dari `fields=` ikut diteruskan, vector tidak."""
+    model_config = ConfigDict(extra="allow")
+
+    id: int
+    name: str | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_vectors(cls, data):
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if key not in VECTOR_FIELDS}
+        return data
+
+class SearchResult(BaseModel):
+    place: PlaceResult
+
+class BatchIdsRequest(BaseModel):
+    """Body untuk endpoint batch (POST /places/batch, /infobox/batch)."""
+    ids: list[int] = Field(..., min_length=1, max_length=config.BATCH_MAX_IDS)
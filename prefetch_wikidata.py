@@ -0,0 +1,143 @@
+"""
+Prefetch Wikidata enrichment untuk seluruh Place dan simpan sebagai properti node.
+
+Setiap Place mendapat properti:
+    wikidata_image, wikidata_item, wikidata_description, wikidata_fetched_at
+
+enrich_places_with_wikidata_async memakai properti ini langsung dan hanya melakukan
+lookup live untuk Place yang belum di-prefetch atau datanya sudah stale
+(lebih tua dari WIKIDATA_STORED_TTL).
+
+Usage:
+    python prefetch_wikidata.py [--force] [--batch-size 25] [--concurrency 4] [--rate 2]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from database.neo4j_connection import neo4j
+from services.response_cache import invalidate_response_cache
+from services.wikidata import query_wikidata_batch
+
+
+class RateLimiter:
+    """Spread calls evenly so that at most `rate` calls start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_places_page(after_id, page_size, stale_before, force):
+    return neo4j.read(
+        """
+        MATCH (p:Place)
+        WHERE ($after IS NULL OR p.id > $after)
+          AND ($force OR p.wikidata_fetched_at IS NULL OR p.wikidata_fetched_at < $stale_before)
+        RETURN p.id AS id, p.name AS name
+        ORDER BY p.id
+        LIMIT $limit
+        """,
+        {"after": after_id, "limit": page_size, "stale_before": stale_before, "force": force}
+    )
+
+
+def save_enrichment(rows):
+    neo4j.write(
+        """
+        UNWIND $rows AS row
+        MATCH (p:Place {id: row.id})
+        SET p.wikidata_image = row.image,
+            p.wikidata_item = row.wikidata_entity,
+            p.wikidata_description = row.description_id,
+            p.wikidata_fetched_at = row.fetched_at
+        """,
+        {"rows": rows}
+    )
+
+
+def resolve_chunk(names, limiter, retries):
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return query_wikidata_batch(names)
+        except Exception as e:
+            if attempt == retries:
+                print(f"✗ Gagal resolve {len(names)} nama: {e}")
+                return None
+            time.sleep(2 ** attempt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch Wikidata enrichment ke node Place")
+    parser.add_argument("--force", action="store_true", help="Fetch ulang semua Place, termasuk yang masih fresh")
+    parser.add_argument("--page-size", type=int, default=500, help="Jumlah Place per halaman Neo4j")
+    parser.add_argument("--batch-size", type=int, default=config.WIKIDATA_BATCH_SIZE, help="Jumlah nama per SPARQL request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jumlah SPARQL request paralel")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maksimum SPARQL request per detik")
+    parser.add_argument("--retries", type=int, default=2, help="Retry per batch jika request gagal")
+    args = parser.parse_args()
+
+    limiter = RateLimiter(args.rate)
+    stale_before = int(time.time()) - config.WIKIDATA_STORED_TTL
+    after_id = None
+    total, failed = 0, 0
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        while True:
+            places = get_places_page(after_id, args.page_size, stale_before, args.force)
+            if not places:
+                break
+            after_id = places[-1]["id"]
+
+            names = list(dict.fromkeys(p["name"] for p in places if p["name"]))
+            chunks = [names[i:i + args.batch_size] for i in range(0, len(names), args.batch_size)]
+            futures = [executor.submit(resolve_chunk, chunk, limiter, args.retries) for chunk in chunks]
+
+            resolved = {}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is not None:
+                    resolved.update(result)
+
+            # Place yang batch-nya gagal tidak ditulis, supaya dicoba lagi di run berikutnya
+            fetched_at = int(time.time())
+            rows = []
+            for place in places:
+                if place["name"] and place["name"] not in resolved:
+                    failed += 1
+                    continue
+                external = resolved.get(place["name"]) or {}
+                rows.append({
+                    "id": place["id"],
+                    "image": external.get("image"),
+                    "wikidata_entity": external.get("wikidata_entity"),
+                    "description_id": external.get("description_id"),
+                    "fetched_at": fetched_at
+                })
+
+            if rows:
+                save_enrichment(rows)
+            total += len(rows)
+            print(f"✓ {total} Place disimpan ({total / (time.time() - started):.1f} place/s), gagal: {failed}")
+
+    if total:
+        print(f"✓ Response cache API di-invalidate (generation {invalidate_response_cache(neo4j)})")
+    neo4j.driver.close()
+    print("Selesai prefetch Wikidata!")
+
+
+if __name__ == "__main__":
+    main()
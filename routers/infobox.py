@@ -1,11 +1,29 @@
-from fastapi import APIRouter
-from services.infobox_service import get_infobox
+from fastapi import APIRouter, Request
+from models.schemas import BatchIdsRequest
+from services.infobox_service import get_infobox, get_infoboxes
+from services.response_cache import cached_response
 
 router = APIRouter(prefix="/infobox", tags=["Infobox"])
 
+@router.post("/batch")
+async def infobox_batch(body: BatchIdsRequest):
+    """
+    Infobox beberapa Place sekaligus: satu query + enrichment Wikidata bersama.
+    Hasil mengikuti urutan `ids`; id yang tidak ada diganti `{"id": ..., "error": "Place not found"}`.
+    """
+    infos = await get_infoboxes(body.ids)
+    return [
+        info if info is not None else {"id": place_id, "error": "Place not found"}
+        for place_id, info in zip(body.ids, infos)
+    ]
+
 @router.get("/{place_id}")
-def infobox(place_id: int):
-    data = get_infobox(place_id)
-    if data is None:
+async def infobox(place_id: int, request: Request):
+    # Hasil enrichment yang kena deadline Wikidata tidak di-cache, supaya request berikutnya bisa lengkap
+    response = await cached_response(
+        request, "infobox", place_id, lambda: get_infobox(place_id),
+        cacheable=lambda info: not info.get("enrichment_partial")
+    )
+    if response is None:
         return {"error": "Place not found"}
-    return data
+    return response
@@ -1,17 +1,73 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from services.itinerary_service import get_package_itinerary
 from services.package_service import get_package, get_packages
+from services.response_cache import Payload, cached_response
 
 router = APIRouter(prefix="/packages", tags=["Packages"])
 
 
 @router.get("/{package_id}")
-def package_detail(package_id: int):
-    package = get_package(package_id)
-    if not package:
+async def package_detail(
+    package_id: int,
+    request: Request,
+    places_limit: int = Query(default=50, ge=1, le=200, description="Jumlah Place per halaman"),
+    places_cursor: Optional[int] = Query(default=None, description="next_places_cursor dari halaman sebelumnya")
+):
+    response = await cached_response(
+        request, "packages", (package_id, places_limit, places_cursor),
+        lambda: get_package(package_id, places_limit, places_cursor)
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Package not found")
-    return package
+    return response
+
+
+@router.get("/{package_id}/itinerary")
+async def package_itinerary(
+    package_id: int,
+    request: Request,
+    day_minutes: Optional[int] = Query(default=None, ge=30, le=1440, description="Budget waktu per hari (menit)"),
+    speed_kmh: Optional[float] = Query(default=None, gt=0, le=200, description="Kecepatan rata-rata perjalanan (km/jam)"),
+    start_place_id: Optional[int] = Query(default=None, description="Place awal (default dipilih otomatis)")
+):
+    """
+    Urutan kunjungan Place di package (nearest-neighbor + 2-opt atas jarak
+    haversine), dibagi per hari berdasarkan budget waktu.
+    """
+    async def load():
+        try:
+            return await get_package_itinerary(package_id, day_minutes, speed_kmh, start_place_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    response = await cached_response(
+        request, "package-itinerary", (package_id, day_minutes, speed_kmh, start_place_id), load
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Package not found")
+    return response
 
 
 @router.get("")
-def list_packages(limit: int = 10):
-    return get_packages(limit)
+async def list_packages(
+    request: Request,
+    limit: int = Query(default=10, ge=1, le=100, description="Jumlah package per halaman"),
+    cursor: Optional[int] = Query(default=None, description="Nilai header X-Next-Cursor dari halaman sebelumnya"),
+    city: Optional[str] = Query(default=None, description="Filter kota"),
+    include_total: bool = Query(default=False, description="Kirim jumlah total package di header X-Total-Count")
+):
+    """
+    Daftar package, urut id. Tetap berupa list; halaman berikutnya lewat
+    header `X-Next-Cursor`, total (jika diminta) lewat header `X-Total-Count`.
+    """
+    async def load():
+        packages, next_cursor, total = await get_packages(limit, cursor, city, include_total)
+        headers = {}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+        if total is not None:
+            headers["X-Total-Count"] = str(total)
+        return Payload(packages, headers)
+
+    return await cached_response(request, "package-list", (limit, cursor, city, include_total), load)
@@ -1,12 +1,44 @@
-from fastapi import APIRouter, HTTPException
-from services.place_service import get_place
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from models.schemas import BatchIdsRequest
+from services.place_service import get_nearby_places, get_place, get_places
+from services.response_cache import cached_response
 
 router = APIRouter(prefix="/places", tags=["Places"])
 
 
+# Harus dideklarasikan sebelum /{place_id}, kalau tidak "nearby" diparse sebagai place_id
+@router.get("/nearby")
+async def nearby_places(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude titik asal"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude titik asal"),
+    k: int = Query(default=10, ge=1, le=100, description="Jumlah hasil"),
+    radius_km: Optional[float] = Query(default=None, gt=0, description="Radius pencarian; kosong = k terdekat"),
+    query: Optional[str] = Query(default=None, description="Query semantic, mis. 'pantai' atau 'museum sejarah'")
+):
+    """
+    Tempat wisata di sekitar sebuah titik (radius atau k-nearest).
+    Dengan `query`, tempat di sekitar titik diurutkan berdasarkan relevansi semantic.
+    """
+    return await get_nearby_places(lat, lon, k, radius_km, query)
+
+
+@router.post("/batch")
+async def place_batch(body: BatchIdsRequest):
+    """
+    Beberapa Place sekaligus dalam satu query. Hasil mengikuti urutan `ids`;
+    id yang tidak ada diganti `{"id": ..., "error": "Place not found"}`.
+    """
+    places = await get_places(body.ids)
+    return [
+        place if place is not None else {"id": place_id, "error": "Place not found"}
+        for place_id, place in zip(body.ids, places)
+    ]
+
+
 @router.get("/{place_id}")
-def place_detail(place_id: int):
-    place = get_place(place_id)
-    if not place:
+async def place_detail(place_id: int, request: Request):
+    response = await cached_response(request, "places", place_id, lambda: get_place(place_id))
+    if response is None:
         raise HTTPException(status_code=404, detail="Place not found")
-    return place
+    return response
@@ -1,11 +1,16 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from database.neo4j_connection import neo4j
+from database.neo4j_connection import async_neo4j
 
 router = APIRouter(prefix="/query", tags=["QueryConsole"])
 
 class Query(BaseModel):
     query: str
+    # Stream hasil sebagai NDJSON (read-only), tanpa buffer seluruh result di memory
+    stream: bool = False
 
 # Daftar keyword berbahaya
 FORBIDDEN = [
@@ -14,7 +19,7 @@ FORBIDDEN = [
 ]
 
 @router.post("/")
-def run_query(body: Query):
+async def run_query(body: Query):
     cypher = body.query.strip()
 
     if not cypher:
@@ -28,8 +33,11 @@ def run_query(body: Query):
                 detail=f"Query terlarang demi keamanan: '{f.strip()}'"
             )
 
+    if body.stream:
+        return await _stream_query(cypher)
+
     try:
-        results = neo4j.query(cypher)
+        results = await async_neo4j.query(cypher)
         return {
             "success": True,
             "results": results
@@ -37,3 +45,27 @@ def run_query(body: Query):
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _stream_query(cypher: str):
+    records = async_neo4j.stream(cypher)
+
+    # Ambil record pertama sebelum response dimulai supaya error query tetap jadi 400
+    try:
+        first = await records.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        await records.aclose()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def ndjson():
+        try:
+            if first is not None:
+                yield json.dumps(jsonable_encoder(first)) + "\n"
+            async for record in records:
+                yield json.dumps(jsonable_encoder(record)) + "\n"
+        finally:
+            await records.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
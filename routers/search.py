@@ -1,34 +1,73 @@
-from fastapi import APIRouter, Query
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from models.schemas import PlaceFilter, SearchResult
 from services.search_service import (
+    parse_fields,
     search_places, 
     search_places_vector,
     search_places_with_reranking,
-    search_places_with_advanced_reranking
+    search_places_with_advanced_reranking,
+    search_places_hybrid
 )
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
-@router.get("/")
-def search(query: str):
+FIELDS_DESCRIPTION = "Properti Place tambahan (dipisah koma), di luar field default. Embedding tidak bisa diminta"
+
+def _fields(fields: Optional[str]) -> Tuple[str, ...]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=List[SearchResult])
+async def search(
+    response: Response,
+    query: str,
+    enrich: bool = Query(default=True, description="Enrich hasil dengan Wikidata"),
+    max_enrich: int = Query(default=5, description="Jumlah hasil teratas yang di-enrich (batch mode: satu SPARQL request)"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    limit: int = Query(default=20, ge=1, le=100, description="Jumlah hasil per halaman"),
+    cursor: Optional[str] = Query(default=None, description="Nilai header X-Next-Cursor dari halaman sebelumnya"),
+    fuzzy: bool = Query(default=True, description="Toleransi typo"),
+    prefix: bool = Query(default=True, description="Prefix match untuk kata yang belum lengkap")
+):
     """
-    Basic keyword search - mencari tempat wisata berdasarkan nama.
-    Paling cepat tapi paling sederhana.
+    Keyword search via full-text index - nama, deskripsi, kota dan kategori,
+    diurutkan berdasarkan relevance. Paling cepat.
+
+    Halaman berikutnya: kirim nilai header `X-Next-Cursor` sebagai `cursor`.
     """
-    return search_places(query)
+    try:
+        results, next_cursor = await search_places(
+            query, enrich, max_enrich, _fields(fields), limit, cursor, fuzzy, prefix
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
 
-@router.get("/semanticly")
-def search_semanticly(query: str, k: int = 5):
+@router.get("/semanticly", response_model=List[SearchResult])
+async def search_semanticly(
+    query: str,
+    k: int = 5,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    filters: PlaceFilter = Depends()
+):
     """
     Semantic search menggunakan vector embeddings.
     Lebih pintar dari keyword search, bisa menangkap semantic similarity.
     """
-    return search_places_vector(query, k)
+    return await search_places_vector(query, k, fields=_fields(fields), filters=filters)
 
-@router.get("/rerank")
-def search_with_rerank(
+@router.get("/rerank", response_model=List[SearchResult])
+async def search_with_rerank(
     query: str,
     initial_k: int = Query(default=20, description="Jumlah kandidat awal dari vector search"),
-    top_k: int = Query(default=5, description="Jumlah hasil akhir setelah reranking")
+    top_k: int = Query(default=5, description="Jumlah hasil akhir setelah reranking"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    filters: PlaceFilter = Depends()
 ):
     """
     Semantic search + Reranking menggunakan cross-encoder.
@@ -41,14 +80,16 @@ def search_with_rerank(
     Paling akurat untuk mencari relevansi hasil pencarian.
     Lebih lambat dari /semanticly tapi lebih presisi.
     """
-    return search_places_with_reranking(query, initial_k, top_k)
+    return await search_places_with_reranking(query, initial_k, top_k, _fields(fields), filters)
 
-@router.get("/rerank-advanced")
-def search_with_advanced_rerank(
+@router.get("/rerank-advanced", response_model=List[SearchResult])
+async def search_with_advanced_rerank(
     query: str,
     initial_k: int = Query(default=20, description="Jumlah kandidat awal dari vector search"),
     top_k: int = Query(default=5, description="Jumlah hasil akhir setelah reranking"),
-    use_description: bool = Query(default=True, description="Gunakan deskripsi dalam reranking")
+    use_description: bool = Query(default=True, description="Gunakan deskripsi dalam reranking"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    filters: PlaceFilter = Depends()
 ):
     """
     Advanced semantic search + Reranking dengan mempertimbangkan deskripsi.
@@ -61,4 +102,26 @@ def search_with_advanced_rerank(
     Akan mencocokkan query dengan nama DAN deskripsi tempat wisata.
     Paling lambat tapi paling pintar untuk query deskriptif.
     """
-    return search_places_with_advanced_reranking(query, initial_k, top_k, use_description)
\ No newline at end of file
+    return await search_places_with_advanced_reranking(query, initial_k, top_k, use_description, _fields(fields), filters)
+
+@router.get("/hybrid", response_model=List[SearchResult])
+async def search_hybrid(
+    query: str,
+    initial_k: int = Query(default=20, ge=1, le=200, description="Jumlah kandidat dari full-text dan dari vector search"),
+    top_k: int = Query(default=5, ge=1, description="Jumlah hasil akhir"),
+    rerank: bool = Query(default=False, description="Rerank hasil fusion dengan cross-encoder"),
+    use_description: bool = Query(default=True, description="Gunakan deskripsi dalam reranking"),
+    enrich: bool = Query(default=True, description="Enrich hasil dengan Wikidata"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Hybrid search: keyword (full-text) + semantic (vector) dalam satu request.
+
+    Kedua retriever jalan bersamaan dan digabung dengan reciprocal rank fusion,
+    sehingga nama persis ("Monas") maupun query deskriptif ("pantai untuk
+    snorkeling") sama-sama tertangkap. Dengan `rerank=true` hasil fusion
+    direrank dengan cross-encoder.
+    """
+    return await search_places_hybrid(
+        query, initial_k, top_k, rerank, use_description, enrich, _fields(fields)
+    )
@@ -5,6 +5,13 @@ if __name__ == "__main__":
     # Get PORT from environment, default to 8000
     port = int(os.getenv("PORT", "8000"))
     
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # Multi-worker: gunicorn dengan preload_app supaya bobot model di-load
+        # sekali sebelum fork dan di-share antar worker (lihat gunicorn.conf.py)
+        print(f"Starting gunicorn with {workers} workers on 0.0.0.0:{port}")
+        os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn.conf.py", "main:app"])
+
     print(f"Starting server on 0.0.0.0:{port}")
     
     # Run uvicorn
@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+class MicroBatcher:
+    """
+    Cross-request dynamic micro-batching untuk model inference.
+
+    Calls submitted from many requests (threads or the event loop) are
+    collected for at most `max_wait_ms` after the first one arrives, or
+    until `max_batch_size` is reached, then run as a single call of
+    `batch_fn`. Each caller gets its own result back through a Future.
+    With `workers` > 1 several batches can be in flight at once (e.g. one
+    per inference process); batches are still collected one at a time.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        size_fn: Optional[Callable[[Any], int]] = None,
+        name: str = "batcher",
+        workers: int = 1
+    ):
+        """
+        Args:
+            batch_fn: Function taking a list of items and returning one result per item
+            max_batch_size: Maximum total size of one batch
+            max_wait_ms: Maximum time to wait for more items after the first one
+            size_fn: Size of a single item (default 1), e.g. number of pairs in a rerank call
+            name: Thread name, for debugging
+            workers: Number of batches that may run `batch_fn` concurrently
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.size_fn = size_fn or (lambda item: 1)
+        self.name = name
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._carry: Optional[tuple] = None
+        self._start_lock = threading.Lock()
+        self._collect_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a Future for its result."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(item).result()
+
+    def _ensure_started(self) -> None:
+        # Thread baru distart saat dipakai, supaya import module tidak membuat thread (aman untuk fork)
+        if self._threads:
+            return
+        with self._start_lock:
+            if not self._threads:
+                threads = [
+                    threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                    for i in range(self.workers)
+                ]
+                for thread in threads:
+                    thread.start()
+                self._threads = threads
+
+    def _collect(self) -> List[tuple]:
+        # Item yang tidak muat di batch sebelumnya menjadi awal batch berikutnya
+        first, self._carry = self._carry, None
+        if first is None:
+            first = self._queue.get()
+        batch = [first]
+        size = self.size_fn(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            entry_size = self.size_fn(entry[0])
+            if size + entry_size > self.max_batch_size:
+                self._carry = entry
+                break
+            batch.append(entry)
+            size += entry_size
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Satu thread mengumpulkan batch pada satu waktu; batch_fn berjalan paralel
+            with self._collect_lock:
+                batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "workers": self.workers,
+        }
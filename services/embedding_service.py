@@ -0,0 +1,99 @@
+import asyncio
+from typing import List
+
+import numpy as np
+import config
+from services import inference_pool
+from services.batching import MicroBatcher
+from services.cache import LRUCache, MISSING, normalize_key
+from services.model_backend import load_sentence_transformer
+from services.model_registry import registry
+
+if config.INFERENCE_MODE == "process":
+    # Model hidup di inference process pool: "loaded" baru setelah semua worker pool
+    # selesai load model (initializer); warm-up menjalankan encode lewat pool
+    def _start_pool():
+        inference_pool.start()
+        return inference_pool
+
+    registry.register("embedding", _start_pool, warmup=lambda _: encode_texts(["warm up"]))
+else:
+    registry.register(
+        "embedding",
+        lambda: load_sentence_transformer(config.EMBEDDING_MODEL_NAME),
+        warmup=lambda model: model.encode(["warm up"])
+    )
+
+
+def get_embedding_model():
+    """Bi-encoder dari model registry (di-load saat pertama dipakai jika belum di-preload)."""
+    return registry.get("embedding")
+
+# Cache embedding query yang sudah dinormalisasi, dipakai bersama semua endpoint semantic.
+# Disimpan sebagai float32 read-only (384 dim = 1.5 KB per query).
+_query_cache = LRUCache(maxsize=config.EMBEDDING_CACHE_SIZE)
+
+
+def encode_texts(texts: List[str]) -> List[np.ndarray]:
+    """Encode many texts in one batched forward pass."""
+    if config.INFERENCE_MODE == "process":
+        return inference_pool.encode_texts(texts)
+    embeddings = get_embedding_model().encode(texts, batch_size=max(1, len(texts)))
+    return list(np.asarray(embeddings, dtype=np.float32))
+
+
+# Encode dari banyak request digabung jadi satu forward pass
+_encode_batcher = MicroBatcher(
+    encode_texts,
+    max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=config.INFERENCE_MAX_WAIT_MS,
+    name="encode-batcher",
+    workers=inference_pool.batch_workers()
+) if config.INFERENCE_BATCHING else None
+
+
+def get_cached_query_embedding(q: str):
+    """Return the cached embedding for a query, or None if it has not been encoded yet."""
+    if config.EMBEDDING_CACHE_SIZE <= 0:
+        return None
+    embedding = _query_cache.get(normalize_key(q), MISSING)
+    return None if embedding is MISSING else embedding
+
+
+def _store(q: str, embedding: np.ndarray) -> np.ndarray:
+    embedding.setflags(write=False)
+    if config.EMBEDDING_CACHE_SIZE > 0:
+        _query_cache.set(normalize_key(q), embedding)
+    return embedding
+
+
+def encode_and_cache_query(q: str) -> np.ndarray:
+    """Run the forward pass for a query (cache already checked) and cache the result."""
+    if _encode_batcher is not None:
+        return _store(q, _encode_batcher(q))
+    return _store(q, encode_texts([q])[0])
+
+
+async def encode_query_async(q: str) -> np.ndarray:
+    """
+    Encode a search query, skipping the transformer forward pass for
+    queries seen before (case and whitespace insensitive). With micro-batching
+    enabled the event loop awaits the batcher directly instead of holding a thread.
+
+    Returns:
+        float32 embedding vector (read-only, shared between callers)
+    """
+    cached = get_cached_query_embedding(q)
+    if cached is not None:
+        return cached
+    if _encode_batcher is not None:
+        return _store(q, await asyncio.wrap_future(_encode_batcher.submit(q)))
+    return await asyncio.to_thread(encode_and_cache_query, q)
+
+
+def embedding_cache_stats():
+    return _query_cache.stats()
+
+
+def encode_batcher_stats():
+    return _encode_batcher.stats() if _encode_batcher is not None else {"enabled": False}
@@ -0,0 +1,138 @@
+"""
+Process pool khusus model inference (INFERENCE_MODE=process).
+
+Embedding dan reranking dijalankan di proses terpisah dengan antrian,
+batas concurrency dan setting thread torch sendiri, sehingga forward pass
+yang CPU-bound tidak berebut GIL / threadpool dengan endpoint graph-only
+seperti /places/{id} dan /health di proses API.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+import numpy as np
+import config
+
+
+class InferenceBusyError(RuntimeError):
+    """Raised when the inference queue stays full for INFERENCE_QUEUE_TIMEOUT seconds."""
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_started = False
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(config.INFERENCE_MAX_PENDING)
+
+# Instance RerankingService di dalam worker process, per (model_name, backend)
+_worker_rerankers = {}
+
+
+def _init_worker():
+    # Dengan spawn, main.py (jika dijalankan langsung) di-import ulang sebagai __mp_main__;
+    # main.py melewati preload model untuk __mp_main__, model di worker di-load di sini.
+    # Di dalam worker model dijalankan langsung, bukan dikirim ke pool lagi
+    config.INFERENCE_MODE = "inline"
+    config.INFERENCE_BATCHING = False
+
+    from services.model_registry import registry
+    import services.embedding_service  # noqa: F401  (registrasi model embedding)
+    import services.reranking_service  # noqa: F401  (registrasi model reranker)
+    registry.warm_up()
+
+
+def _ready_task() -> int:
+    # Initializer (load + warm-up model) selalu selesai sebelum task pertama di worker
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _encode_task(texts: List[str]) -> List[np.ndarray]:
+    from services.embedding_service import encode_texts
+    return encode_texts(texts)
+
+
+def _predict_task(model_name: str, backend: str, pairs: List[List[str]]) -> np.ndarray:
+    from services.reranking_service import RerankingService, get_reranker
+    reranker = get_reranker()
+    if (reranker.model_name, reranker.backend) != (model_name, backend):
+        key = (model_name, backend)
+        if key not in _worker_rerankers:
+            _worker_rerankers[key] = RerankingService(model_name, backend)
+        reranker = _worker_rerankers[key]
+    return reranker._model_predict(pairs)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Start the inference process pool on first use (per API worker, never before fork)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=config.INFERENCE_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+    return _pool
+
+
+def start(timeout: float = 600) -> None:
+    """
+    Start the pool and wait until every worker process has run its
+    initializer (models loaded and warmed up). Used as the registry loader
+    in INFERENCE_MODE=process, so /ready waits for the pool processes.
+    """
+    global _started
+    if _started:
+        return
+    pool = get_pool()
+    ready = set()
+    deadline = time.monotonic() + timeout
+    # Task dikirim bersamaan supaya pool men-spawn semua worker; ulangi sampai setiap pid terlihat
+    while len(ready) < config.INFERENCE_PROCESSES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Inference pool: {len(ready)}/{config.INFERENCE_PROCESSES} workers ready")
+        futures = [pool.submit(_ready_task) for _ in range(config.INFERENCE_PROCESSES)]
+        ready.update(future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures)
+    _started = True
+
+
+def batch_workers() -> int:
+    """Micro-batches in flight per model: one per inference process, so every process stays busy."""
+    return max(1, config.INFERENCE_PROCESSES) if config.INFERENCE_MODE == "process" else 1
+
+
+def _run(fn, *args):
+    if not _slots.acquire(timeout=config.INFERENCE_QUEUE_TIMEOUT):
+        raise InferenceBusyError("Inference queue is full, try again later")
+    try:
+        return get_pool().submit(fn, *args).result()
+    except BrokenProcessPool:
+        # Worker mati (mis. OOM): buang pool supaya request berikutnya memulai pool baru
+        shutdown()
+        raise
+    finally:
+        _slots.release()
+
+
+def encode_texts(texts: List[str]) -> List[np.ndarray]:
+    """Encode texts in the inference process pool."""
+    return _run(_encode_task, texts)
+
+
+def predict_pairs(model_name: str, backend: str, pairs: List[List[str]]) -> np.ndarray:
+    """Score (query, document) pairs in the inference process pool."""
+    return _run(_predict_task, model_name, backend, pairs)
+
+
+def shutdown() -> None:
+    global _pool, _started
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _started = False
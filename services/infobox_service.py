@@ -1,11 +1,9 @@
-from database.neo4j_connection import neo4j
-from services.wikidata import fetch_wikidata_image, enrich_place_with_wikidata
+from typing import List, Optional
+from database.neo4j_connection import async_neo4j
+from services.wikidata import enrich_place_with_wikidata_async, enrich_places_with_wikidata_async
 
-def get_infobox(place_id: int):
-
-    cypher = """
-    MATCH (p:Place {id: $id})
-    RETURN {
+_INFO_PROJECTION = """
+    {
         id: p.id,
         name: p.name,
         description: p.description,
@@ -15,16 +13,49 @@ def get_infobox(place_id: int):
         rating: p.rating,
         time_minutes: p.time_minutes,
         lat: p.lat,
-        long: p.long
-    } AS info
+        long: p.long,
+        wikidata_image: p.wikidata_image,
+        wikidata_item: p.wikidata_item,
+        wikidata_description: p.wikidata_description,
+        wikidata_fetched_at: p.wikidata_fetched_at
+    }
+"""
+
+async def get_infobox(place_id: int):
+
+    cypher = f"""
+    MATCH (p:Place {{id: $id}})
+    RETURN {_INFO_PROJECTION} AS info
     """
 
-    result = neo4j.query(cypher, {"id": place_id})
+    result = await async_neo4j.read(cypher, {"id": place_id})
 
     if not result:
         return None
 
     info = result[0]["info"]
     
-    # Enrich with Wikidata
-    return enrich_place_with_wikidata(info)
+    # Enrich with Wikidata (pakai properti hasil prefetch jika masih fresh)
+    return await enrich_place_with_wikidata_async(info)
+
+async def get_infoboxes(place_ids: List[int]) -> List[Optional[dict]]:
+    """
+    Batch infobox: satu query UNWIND, lalu enrichment Wikidata untuk semua
+    Place sekaligus (batched SPARQL, chunk berjalan concurrent).
+
+    Returns:
+        Infobox per id, urutan sama dengan place_ids (None jika tidak ditemukan)
+    """
+    cypher = f"""
+    UNWIND $ids AS id
+    MATCH (p:Place {{id: id}})
+    RETURN {_INFO_PROJECTION} AS info
+    """
+
+    result = await async_neo4j.read(cypher, {"ids": list(dict.fromkeys(place_ids))})
+    infos = [row["info"] for row in result]
+    if infos:
+        infos = await enrich_places_with_wikidata_async(infos, max_enrich=len(infos))
+
+    by_id = {info["id"]: info for info in infos}
+    return [by_id.get(place_id) for place_id in place_ids]
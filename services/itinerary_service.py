@@ -0,0 +1,250 @@
+"""
+Itinerary untuk package: urutan kunjungan Place yang mendekati optimal, dibagi per hari.
+
+Urutan dihitung sebagai open path (tanpa kembali ke titik awal) di atas matriks
+jarak haversine: nearest-neighbor sebagai tur awal, lalu diperbaiki dengan 2-opt.
+Open path diselesaikan sebagai tur tertutup dengan satu node dummy berjarak 0
+ke semua Place (atau hanya ke Place awal jika start ditentukan), lalu tur
+dipotong di node dummy tersebut.
+
+Waktu tempuh diestimasi dari jarak garis lurus dan ITINERARY_TRAVEL_SPEED_KMH,
+bukan rute jalan sebenarnya.
+"""
+import asyncio
+from typing import List, Optional
+
+import numpy as np
+
+import config
+from database.neo4j_connection import async_neo4j
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Matriks jarak (km) antar semua pasangan titik, dihitung sekaligus dengan broadcasting."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbor_tour(dist: np.ndarray, start: int = 0) -> np.ndarray:
+    n = len(dist)
+    tour = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+    current = start
+    for i in range(n):
+        tour[i] = current
+        visited[current] = True
+        if i < n - 1:
+            current = int(np.argmin(np.where(visited, np.inf, dist[current])))
+    return tour
+
+
+def two_opt(tour: np.ndarray, dist: np.ndarray, max_passes: int, eps: float = 1e-9) -> np.ndarray:
+    """
+    Perbaiki tur tertutup dengan 2-opt. Untuk setiap edge (a, b) semua kandidat
+    edge (c, d) dievaluasi sekaligus, lalu segmen dengan penghematan terbesar dibalik.
+    """
+    tour = tour.copy()
+    m = len(tour)
+    if m < 4:
+        return tour
+    for _ in range(max_passes):
+        improved = False
+        for i in range(m - 2):
+            a, b = tour[i], tour[i + 1]
+            # Edge (t[m-1], t[0]) bersebelahan dengan edge (t[0], t[1])
+            j = np.arange(i + 2, m if i > 0 else m - 1)
+            if len(j) == 0:
+                continue
+            c, d = tour[j], tour[(j + 1) % m]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            best = int(np.argmin(delta))
+            if delta[best] < -eps:
+                k = j[best]
+                tour[i + 1:k + 1] = tour[i + 1:k + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+def optimize_order(dist: np.ndarray, start: Optional[int] = None, max_passes: Optional[int] = None) -> np.ndarray:
+    """
+    Urutan kunjungan (open path) yang mendekati jarak total minimum.
+
+    Args:
+        dist: Matriks jarak n x n
+        start: Index titik awal (None = bebas)
+        max_passes: Batas pass 2-opt (default ITINERARY_TWO_OPT_MAX_PASSES)
+
+    Returns:
+        Array index 0..n-1 dalam urutan kunjungan
+    """
+    n = len(dist)
+    if n <= 2:
+        order = np.arange(n)
+        return order if start is None or start == 0 else order[::-1]
+
+    # Node dummy (index n): penghubung ujung-ujung path menjadi tur tertutup.
+    # Dengan start, hanya edge dummy-start yang murah sehingga start selalu ujung path.
+    big = float(dist.sum()) + 1.0
+    augmented = np.zeros((n + 1, n + 1))
+    augmented[:n, :n] = dist
+    if start is not None:
+        augmented[n, :n] = augmented[:n, n] = big
+        augmented[n, start] = augmented[start, n] = 0.0
+
+    first = start if start is not None else int(np.argmax(dist.sum(axis=1)))
+    tour = np.concatenate(([n], nearest_neighbor_tour(dist, first)))
+    tour = two_opt(tour, augmented, config.ITINERARY_TWO_OPT_MAX_PASSES if max_passes is None else max_passes,
+                   eps=1e-9 * big)
+
+    pos = int(np.flatnonzero(tour == n)[0])
+    order = np.concatenate((tour[pos + 1:], tour[:pos]))
+    if start is not None and order[0] != start:
+        order = order[::-1]
+    return order
+
+
+def path_length(order: np.ndarray, dist: np.ndarray) -> float:
+    return float(dist[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def split_days(stops: List[dict], day_minutes: int) -> List[dict]:
+    """
+    Bagi stop berurutan ke hari-hari dengan budget day_minutes (kunjungan + perjalanan).
+    Setiap hari dimulai di stop pertamanya, tanpa waktu tempuh. Stop yang lebih
+    lama dari budget mendapat satu hari sendiri.
+    """
+    days = []
+    current = None
+    for stop in stops:
+        travel = stop["travel_minutes"] or 0.0
+        if current is None or (current["places"] and current["total_minutes"] + travel + stop["visit_minutes"] > day_minutes):
+            current = {"day": len(days) + 1, "places": [], "visit_minutes": 0, "travel_minutes": 0.0, "total_minutes": 0.0}
+            days.append(current)
+            stop = {**stop, "travel_km": None, "travel_minutes": None}
+            travel = 0.0
+        current["places"].append(stop)
+        current["visit_minutes"] += stop["visit_minutes"]
+        current["travel_minutes"] = round(current["travel_minutes"] + travel, 1)
+        current["total_minutes"] = round(current["total_minutes"] + travel + stop["visit_minutes"], 1)
+    return days
+
+
+def build_itinerary(places: List[dict], day_minutes: int, speed_kmh: float, start_place_id: Optional[int] = None) -> dict:
+    """
+    Hitung itinerary dari daftar Place (dengan lat, long, time_minutes).
+
+    Place tanpa koordinat tidak bisa diurutkan dan ditaruh di akhir tanpa waktu tempuh.
+
+    Raises:
+        ValueError: Jika start_place_id tidak ada di daftar Place (atau tidak punya koordinat)
+    """
+    located = [p for p in places if p.get("lat") is not None and p.get("long") is not None]
+    unlocated = [p for p in places if p.get("lat") is None or p.get("long") is None]
+
+    start = None
+    if start_place_id is not None:
+        start = next((i for i, p in enumerate(located) if p["id"] == start_place_id), None)
+        if start is None:
+            raise ValueError(f"start_place_id {start_place_id} is not a place with coordinates in this package")
+
+    if located:
+        dist = haversine_matrix(
+            np.array([p["lat"] for p in located], dtype=np.float64),
+            np.array([p["long"] for p in located], dtype=np.float64)
+        )
+        order = optimize_order(dist, start)
+    else:
+        dist, order = np.zeros((0, 0)), np.arange(0)
+
+    stops = []
+    previous = None
+    for index in order:
+        place = located[index]
+        travel_km = None if previous is None else float(dist[previous, index])
+        stops.append({
+            **place,
+            "visit_minutes": place.get("time_minutes") or config.ITINERARY_DEFAULT_VISIT_MINUTES,
+            "travel_km": None if travel_km is None else round(travel_km, 2),
+            "travel_minutes": None if travel_km is None else round(travel_km / speed_kmh * 60, 1),
+        })
+        previous = index
+    for place in unlocated:
+        stops.append({
+            **place,
+            "visit_minutes": place.get("time_minutes") or config.ITINERARY_DEFAULT_VISIT_MINUTES,
+            "travel_km": None,
+            "travel_minutes": None,
+        })
+
+    days = split_days(stops, day_minutes)
+    return {
+        "day_minutes": day_minutes,
+        "speed_kmh": speed_kmh,
+        "total_distance_km": round(sum(s["travel_km"] or 0.0 for d in days for s in d["places"]), 2),
+        "total_travel_minutes": round(sum(d["travel_minutes"] for d in days), 1),
+        "total_visit_minutes": sum(d["visit_minutes"] for d in days),
+        "days": days,
+    }
+
+
+async def get_package_itinerary(
+    package_id: int,
+    day_minutes: Optional[int] = None,
+    speed_kmh: Optional[float] = None,
+    start_place_id: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Itinerary untuk semua Place di sebuah package.
+
+    Args:
+        package_id: Id package
+        day_minutes: Budget waktu per hari (default ITINERARY_DAY_MINUTES)
+        speed_kmh: Kecepatan rata-rata perjalanan (default ITINERARY_TRAVEL_SPEED_KMH)
+        start_place_id: Place awal (None = dipilih otomatis)
+
+    Returns:
+        Itinerary package, atau None jika package tidak ditemukan
+
+    Raises:
+        ValueError: Jika start_place_id tidak valid untuk package ini
+    """
+    cypher = """
+    MATCH (pkg:Package {id: $id})
+    CALL {
+        WITH pkg
+        MATCH (pkg)-[:INCLUDES]->(p:Place)
+        WITH p
+        ORDER BY p.id
+        RETURN collect({
+            id: p.id,
+            name: p.name,
+            category: p.category,
+            rating: p.rating,
+            time_minutes: p.time_minutes,
+            lat: p.lat,
+            long: p.long
+        }) AS places
+    }
+    RETURN pkg.id AS id, pkg.city AS city, places
+    """
+    result = await async_neo4j.read(cypher, {"id": package_id})
+    if not result:
+        return None
+
+    row = result[0]
+    # CPU-bound (2-opt); dijalankan di thread supaya event loop tidak tertahan
+    itinerary = await asyncio.to_thread(
+        build_itinerary,
+        row["places"],
+        day_minutes or config.ITINERARY_DAY_MINUTES,
+        speed_kmh or config.ITINERARY_TRAVEL_SPEED_KMH,
+        start_place_id
+    )
+    return {"package_id": row["id"], "city": row["city"], **itinerary}
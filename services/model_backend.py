@@ -0,0 +1,64 @@
+import os
+from sentence_transformers import CrossEncoder, SentenceTransformer
+import config
+
+# "torch"      : PyTorch fp32 (baseline)
+# "torch-int8" : PyTorch dengan dynamic int8 quantization pada layer Linear
+# "onnx"       : ONNX Runtime fp32
+# "onnx-int8"  : ONNX Runtime dengan model dynamic int8 (hasil export_models.py)
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Nama file hasil export_dynamic_quantized_onnx_model per konfigurasi quantization
+ONNX_INT8_FILES = {
+    "arm64": "onnx/model_qint8_arm64.onnx",
+    "avx2": "onnx/model_quint8_avx2.onnx",
+    "avx512": "onnx/model_qint8_avx512.onnx",
+    "avx512_vnni": "onnx/model_qint8_avx512_vnni.onnx",
+}
+
+
+def export_path(model_name: str) -> str:
+    """Local directory where export_models.py stores the ONNX exports of a model."""
+    return os.path.join(config.MODEL_EXPORT_DIR, model_name.replace("/", "__"))
+
+
+def _onnx_source(model_name: str, file_name: str):
+    """Prefer a local export, fall back to the ONNX files published on the Hub."""
+    local = export_path(model_name)
+    if os.path.exists(os.path.join(local, file_name)):
+        return local
+    return model_name
+
+
+def _load(model_cls, model_name: str, backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    if backend == "onnx":
+        file_name = "onnx/model.onnx"
+        return model_cls(_onnx_source(model_name, file_name), backend="onnx", model_kwargs={"file_name": file_name})
+
+    if backend == "onnx-int8":
+        file_name = ONNX_INT8_FILES[config.ONNX_QUANTIZATION]
+        return model_cls(_onnx_source(model_name, file_name), backend="onnx", model_kwargs={"file_name": file_name})
+
+    import torch
+    if config.INFERENCE_TORCH_THREADS > 0:
+        torch.set_num_threads(config.INFERENCE_TORCH_THREADS)
+
+    model = model_cls(model_name)
+    if backend == "torch-int8":
+        # CrossEncoder membungkus HF model di .model, SentenceTransformer adalah nn.Module langsung
+        target = model.model if isinstance(model, CrossEncoder) else model
+        torch.quantization.quantize_dynamic(target, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def load_sentence_transformer(model_name: str, backend: str = None) -> SentenceTransformer:
+    """Load the bi-encoder on the configured backend (EMBEDDING_BACKEND)."""
+    return _load(SentenceTransformer, model_name, backend or config.EMBEDDING_BACKEND)
+
+
+def load_cross_encoder(model_name: str, backend: str = None) -> CrossEncoder:
+    """Load the cross-encoder on the configured backend (RERANK_BACKEND)."""
+    return _load(CrossEncoder, model_name, backend or config.RERANK_BACKEND)
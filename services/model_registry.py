@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelRegistry:
+    """
+    Registry untuk model inference dengan lifecycle eksplisit.
+
+    Models are registered with a loader (and an optional warm-up function)
+    and loaded once per process: either eagerly via preload() - before
+    uvicorn/gunicorn forks workers, so the weights are shared copy-on-write -
+    or lazily on first get(). warm_up() runs one dummy inference per model
+    so the first real request does not pay for lazy initialisation.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._warm: Dict[str, bool] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._warm.setdefault(name, False)
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._models:
+                started = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                self._load_seconds[name] = round(time.perf_counter() - started, 3)
+            return self._models[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def preload(self) -> None:
+        """Load the weights of every registered model (no inference)."""
+        for name in self._loaders:
+            self.get(name)
+
+    def warm_up(self, inference: bool = True) -> None:
+        """
+        Load every model and run its warm-up inference once.
+
+        Args:
+            inference: False = only load the weights (MODEL_WARMUP=false)
+        """
+        for name in self._loaders:
+            try:
+                model = self.get(name)
+                warmup = self._warmups.get(name)
+                if not inference:
+                    self._errors.pop(name, None)
+                    continue
+                if warmup is not None:
+                    warmup(model)
+                self._warm[name] = True
+                self._errors.pop(name, None)
+            except Exception as e:
+                self._errors[name] = f"{type(e).__name__}: {e}"
+
+    def is_ready(self, require_warm: bool = True) -> bool:
+        """True when every model is loaded (and warmed up, unless require_warm is False)."""
+        if require_warm:
+            return bool(self._loaders) and all(self._warm.get(name) for name in self._loaders)
+        return bool(self._loaders) and all(name in self._models for name in self._loaders)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "loaded": name in self._models,
+                "warm": self._warm.get(name, False),
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
@@ -1,35 +1,104 @@
-from database.neo4j_connection import neo4j
+import asyncio
+from typing import List, Optional, Tuple
+from database.neo4j_connection import async_neo4j
 
-def get_package(package_id: int):
+async def get_package(package_id: int, places_limit: int = 50, places_cursor: Optional[int] = None):
+    """
+    Detail package dengan daftar Place yang dipaginasi (keyset pada p.id).
+
+    Args:
+        package_id: Id package
+        places_limit: Jumlah Place per halaman
+        places_cursor: next_places_cursor dari halaman sebelumnya (None = halaman pertama)
+
+    Returns:
+        Package dengan places, places_total dan next_places_cursor (None jika halaman terakhir)
+    """
     cypher = """
     MATCH (pkg:Package {id: $id})
-    OPTIONAL MATCH (pkg)-[:INCLUDES]->(p:Place)
-    WITH pkg, collect({
-        id: p.id,
-        name: p.name,
-        category: p.category,
-        rating: p.rating
-    }) AS places
+    CALL {
+        WITH pkg
+        MATCH (pkg)-[:INCLUDES]->(p:Place)
+        WHERE $after IS NULL OR p.id > $after
+        WITH p
+        ORDER BY p.id
+        LIMIT $limit
+        RETURN collect({
+            id: p.id,
+            name: p.name,
+            category: p.category,
+            rating: p.rating
+        }) AS places
+    }
     RETURN {
         id: pkg.id,
         city: pkg.city,
-        places: places
+        places: places,
+        places_total: COUNT { (pkg)-[:INCLUDES]->(:Place) }
     } AS package
     """
-    result = neo4j.query(cypher, {"id": package_id})
-    return result[0]["package"] if result else None
+    # Ambil satu Place ekstra untuk tahu apakah masih ada halaman berikutnya
+    result = await async_neo4j.read(cypher, {"id": package_id, "after": places_cursor, "limit": places_limit + 1})
+    if not result:
+        return None
 
+    package = result[0]["package"]
+    places = package["places"]
+    package["next_places_cursor"] = None
+    if len(places) > places_limit:
+        package["places"] = places = places[:places_limit]
+        package["next_places_cursor"] = places[-1]["id"]
+    return package
 
 
-def get_packages(limit: int):
+async def count_packages(city: Optional[str] = None) -> int:
+    cypher = """
+    MATCH (pkg:Package)
+    WHERE $city IS NULL OR toLower(pkg.city) = toLower($city)
+    RETURN count(pkg) AS total
+    """
+    result = await async_neo4j.read(cypher, {"city": city})
+    return result[0]["total"]
+
+
+async def get_packages(
+    limit: int,
+    cursor: Optional[int] = None,
+    city: Optional[str] = None,
+    include_total: bool = False
+) -> Tuple[List[dict], Optional[int], Optional[int]]:
+    """
+    Daftar package dengan keyset pagination pada pkg.id.
+
+    Args:
+        limit: Jumlah package per halaman
+        cursor: Id package terakhir dari halaman sebelumnya (None = halaman pertama)
+        city: Filter kota (case-insensitive)
+        include_total: Hitung juga jumlah total package (query count terpisah, berjalan bersamaan)
+
+    Returns:
+        (packages, next_cursor, total) - next_cursor None di halaman terakhir, total None jika tidak diminta
+    """
     cypher = """
     MATCH (pkg:Package)
+    WHERE ($after IS NULL OR pkg.id > $after)
+      AND ($city IS NULL OR toLower(pkg.city) = toLower($city))
     RETURN {
         id: pkg.id,
         city: pkg.city
     } AS package
+    ORDER BY pkg.id
     LIMIT $limit
     """
-    result = neo4j.query(cypher, {"limit": limit})
-    return [row["package"] for row in result]
+    page = async_neo4j.read(cypher, {"after": cursor, "city": city, "limit": limit + 1})
+    if include_total:
+        result, total = await asyncio.gather(page, count_packages(city))
+    else:
+        result, total = await page, None
 
+    packages = [row["package"] for row in result]
+    next_cursor = None
+    if len(packages) > limit:
+        packages = packages[:limit]
+        next_cursor = packages[-1]["id"]
+    return packages, next_cursor, total
@@ -1,6 +1,10 @@
-from database.neo4j_connection import neo4j
+from typing import List, Optional
+import config
+from database.neo4j_connection import async_neo4j
+from services.embedding_service import encode_query_async
+from services.vector_index import vector_index
 
-def get_place(place_id: int):
+async def get_place(place_id: int):
     cypher = """
     MATCH (p:Place {id: $id})
     RETURN {
@@ -14,5 +18,115 @@ def get_place(place_id: int):
         long: p.long
     } AS place
     """
-    result = neo4j.query(cypher, {"id": place_id})
+    result = await async_neo4j.read(cypher, {"id": place_id})
     return result[0]["place"] if result else None
+
+
+async def get_places(place_ids: List[int]) -> List[Optional[dict]]:
+    """
+    Batch lookup: satu query UNWIND untuk semua id.
+
+    Returns:
+        Place per id, urutan sama dengan place_ids (None jika tidak ditemukan)
+    """
+    cypher = """
+    UNWIND $ids AS id
+    MATCH (p:Place {id: id})
+    RETURN {
+        id: p.id,
+        name: p.name,
+        city: p.city,
+        category: p.category,
+        rating: p.rating,
+        price: p.price,
+        lat: p.lat,
+        long: p.long
+    } AS place
+    """
+    result = await async_neo4j.read(cypher, {"ids": list(dict.fromkeys(place_ids))})
+    by_id = {row["place"]["id"]: row["place"] for row in result}
+    return [by_id.get(place_id) for place_id in place_ids]
+
+
+async def _places_within(lat: float, lon: float, radius_m: float, limit: int) -> List[dict]:
+    # Predicate point.distance(p.location, point(...)) <= radius memakai point index
+    cypher = """
+    MATCH (p:Place)
+    WHERE point.distance(p.location, point({latitude: $lat, longitude: $lon})) <= $radius
+    WITH p, point.distance(p.location, point({latitude: $lat, longitude: $lon})) AS distance
+    ORDER BY distance
+    LIMIT $limit
+    RETURN {
+        id: p.id,
+        name: p.name,
+        city: p.city,
+        category: p.category,
+        rating: p.rating,
+        price: p.price,
+        lat: p.lat,
+        long: p.long,
+        distance_m: round(distance)
+    } AS place
+    """
+    result = await async_neo4j.read(cypher, {"lat": lat, "lon": lon, "radius": radius_m, "limit": limit})
+    return [row["place"] for row in result]
+
+
+async def _semantic_scores(query: str, place_ids: List[int]) -> dict:
+    """Cosine score (skala 0-1, sama dengan vector index) query terhadap Place tertentu."""
+    embedding = await encode_query_async(query)
+    if config.VECTOR_SEARCH_BACKEND == "local" and vector_index.is_ready():
+        return dict(vector_index.search(embedding, len(place_ids), place_ids))
+
+    cypher = """
+    UNWIND $ids AS id
+    MATCH (p:Place {id: id})
+    WHERE p.embedding IS NOT NULL
+    RETURN p.id AS id, vector.similarity.cosine(p.embedding, $embedding) AS score
+    """
+    result = await async_neo4j.read(cypher, {"ids": place_ids, "embedding": embedding.tolist()})
+    return {row["id"]: row["score"] for row in result}
+
+
+async def get_nearby_places(
+    lat: float,
+    lon: float,
+    k: int = 10,
+    radius_km: Optional[float] = None,
+    query: Optional[str] = None
+) -> List[dict]:
+    """
+    Tempat wisata terdekat dari sebuah titik, via point index place_location_index.
+
+    Args:
+        lat: Latitude titik asal
+        lon: Longitude titik asal
+        k: Jumlah hasil
+        radius_km: Hanya Place dalam radius ini; None = k-nearest (radius diperbesar bertahap)
+        query: Jika diisi, Place di sekitar titik diurutkan berdasarkan kemiripan semantic
+
+    Returns:
+        List Place dengan distance_m (dan score jika ada query), urut jarak atau score
+    """
+    # Tanpa query cukup k terdekat, dengan query ambil pool yang lebih besar untuk diranking semantic
+    pool = max(k, config.NEARBY_SEMANTIC_POOL) if query else k
+
+    if radius_km is not None:
+        places = await _places_within(lat, lon, radius_km * 1000, pool)
+    else:
+        radius_km = min(config.NEARBY_INITIAL_RADIUS_KM, config.NEARBY_MAX_RADIUS_KM)
+        while True:
+            places = await _places_within(lat, lon, radius_km * 1000, pool)
+            if len(places) >= pool or radius_km >= config.NEARBY_MAX_RADIUS_KM:
+                break
+            radius_km = min(radius_km * 2, config.NEARBY_MAX_RADIUS_KM)
+
+    if not query or not places:
+        return places[:k]
+
+    scores = await _semantic_scores(query, [place["id"] for place in places])
+    ranked = [place for place in places if place["id"] in scores]
+    for place in ranked:
+        place["score"] = scores[place["id"]]
+    ranked.sort(key=lambda place: place["score"], reverse=True)
+    return ranked[:k]
@@ -1,5 +1,18 @@
-from sentence_transformers import CrossEncoder
 from typing import List, Dict, Any
+import hashlib
+import threading
+import numpy as np
+import config
+from services import inference_pool
+from services.batching import MicroBatcher
+from services.cache import LRUCache, MISSING, normalize_key
+from services.model_backend import load_cross_encoder
+from services.model_registry import registry
+
+# Skor cross-encoder deterministik, jadi bisa di-cache per (model, query, dokumen)
+_score_cache = LRUCache(maxsize=config.RERANK_SCORE_CACHE_SIZE)
+_score_stats = {"requests": 0, "pairs_requested": 0, "pairs_scored": 0}
+_score_stats_lock = threading.Lock()
 
 class RerankingService:
     """
@@ -8,16 +21,137 @@ class RerankingService:
     kemudian mengurutkan ulang hasil berdasarkan skor relevansi yang lebih akurat.
     """
     
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+    def __init__(self, model_name: str = None, backend: str = None):
         """
         Initialize reranker dengan model cross-encoder.
         Model default: ms-marco-MiniLM-L-6-v2 (ringan, cepat, akurat untuk search relevance)
         
         Args:
-            model_name: Nama model cross-encoder dari Hugging Face
+            model_name: Nama model cross-encoder dari Hugging Face (default: RERANK_MODEL_NAME)
+            backend: Inference backend, lihat model_backend.BACKENDS (default: RERANK_BACKEND)
+        """
+        self.model_name = model_name or config.RERANK_MODEL_NAME
+        self.backend = backend or config.RERANK_BACKEND
+        # Di INFERENCE_MODE=process model hanya di-load di inference process pool
+        self.model = None if config.INFERENCE_MODE == "process" else load_cross_encoder(self.model_name, self.backend)
+        if self.model is None:
+            # Tunggu sampai worker pool selesai load model (no-op jika sudah)
+            inference_pool.start()
+        self._tokenizer = None
+
+        # Predict dari banyak request digabung jadi satu forward pass
+        self._batcher = MicroBatcher(
+            self._predict_batch,
+            max_batch_size=config.INFERENCE_MAX_BATCH_PAIRS,
+            max_wait_ms=config.INFERENCE_MAX_WAIT_MS,
+            size_fn=len,
+            name="rerank-batcher",
+            workers=inference_pool.batch_workers()
+        ) if config.INFERENCE_BATCHING else None
+
+    def _predict_batch(self, pair_lists: List[List[List[str]]]) -> List[np.ndarray]:
+        """Score pair lists dari beberapa request sekaligus, lalu pecah kembali per request."""
+        flat = [pair for pairs in pair_lists for pair in pairs]
+        scores = self._model_predict(flat)
+        results = []
+        offset = 0
+        for pairs in pair_lists:
+            results.append(scores[offset:offset + len(pairs)])
+            offset += len(pairs)
+        return results
+
+    def _predict(self, pairs: List[List[str]]) -> np.ndarray:
+        """Hitung relevance scores untuk pasangan (query, document)."""
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        if self._batcher is not None:
+            return self._batcher(pairs)
+        return self._model_predict(pairs)
+
+    def _score_key(self, query: str, doc: str, max_tokens: int = 0) -> tuple:
+        doc_hash = hashlib.blake2b(doc.encode("utf-8"), digest_size=16).digest()
+        # Backend ikut jadi key karena skor int8 sedikit berbeda dari fp32;
+        # budget token ikut karena dokumen yang dipotong memberi skor berbeda
+        return (self.model_name, self.backend, normalize_key(query), doc_hash, max_tokens or 0)
+
+    def _score_pairs(self, pairs: List[List[str]], max_tokens: List[int] = None) -> np.ndarray:
+        """
+        Relevance scores untuk pasangan (query, document), memakai score cache.
+        Cache key dihitung dari teks mentah; hanya pasangan yang belum ada di
+        cache yang dipotong ke budget tokennya lalu dikirim ke model.
+
+        Args:
+            pairs: Pasangan [query, document]
+            max_tokens: Budget token dokumen per pasangan (None / 0 = tanpa batas)
         """
-        self.model = CrossEncoder(model_name)
-        self.model_name = model_name
+        if max_tokens is None:
+            max_tokens = [0] * len(pairs)
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        if config.RERANK_SCORE_CACHE_SIZE <= 0:
+            uncached = list(range(len(pairs)))
+            keys = []
+        else:
+            keys = [self._score_key(q, doc, budget) for (q, doc), budget in zip(pairs, max_tokens)]
+            uncached = []
+            for i, key in enumerate(keys):
+                cached = _score_cache.get(key, MISSING)
+                if cached is MISSING:
+                    uncached.append(i)
+                else:
+                    scores[i] = cached
+
+        if uncached:
+            predicted = self._predict([
+                [pairs[i][0], self._truncate_tokens(pairs[i][1], max_tokens[i])] for i in uncached
+            ])
+            for i, score in zip(uncached, predicted):
+                scores[i] = score
+                if keys:
+                    _score_cache.set(keys[i], float(score))
+
+        with _score_stats_lock:
+            _score_stats["requests"] += 1
+            _score_stats["pairs_requested"] += len(pairs)
+            _score_stats["pairs_scored"] += len(uncached)
+        return scores
+
+    def _model_predict(self, pairs: List[List[str]]) -> np.ndarray:
+        """
+        Satu panggilan model.predict dengan length-bucketed ordering: pasangan
+        diurutkan berdasarkan panjang teks supaya nama yang pendek tidak
+        di-padding sepanjang deskripsi dalam batch yang sama.
+        """
+        if self.model is None:
+            return inference_pool.predict_pairs(self.model_name, self.backend, pairs)
+        order = np.argsort([len(q) + len(doc) for q, doc in pairs], kind="stable")
+        sorted_scores = np.asarray(self.model.predict([pairs[i] for i in order]))
+        scores = np.empty_like(sorted_scores)
+        scores[order] = sorted_scores
+        return scores
+
+    @property
+    def tokenizer(self):
+        """
+        Tokenizer model. Di INFERENCE_MODE=process model tidak ada di proses ini,
+        jadi hanya tokenizer-nya (tanpa bobot) yang di-load dari Hugging Face.
+        """
+        if self._tokenizer is None:
+            if self.model is not None:
+                self._tokenizer = self.model.tokenizer
+            else:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """Potong teks ke maksimal max_tokens token tokenizer model."""
+        if not text or not max_tokens:
+            return text
+        tokenizer = self.tokenizer
+        ids = tokenizer.encode(text, add_special_tokens=False, truncation=True, max_length=max_tokens + 1)
+        if len(ids) <= max_tokens:
+            return text
+        return tokenizer.decode(ids[:max_tokens])
     
     def rerank(
         self, 
@@ -49,7 +183,7 @@ class RerankingService:
             query_doc_pairs.append([query, doc_text])
         
         # Hitung relevance scores menggunakan cross-encoder
-        scores = self.model.predict(query_doc_pairs)
+        scores = self._score_pairs(query_doc_pairs)
         
         # Tambahkan rerank_score ke setiap result
         for i, result in enumerate(results):
@@ -105,7 +239,8 @@ class RerankingService:
         name_field: str = "name",
         description_field: str = "description",
         top_k: int = None,
-        description_weight: float = 0.3
+        description_weight: float = 0.3,
+        description_max_tokens: int = None
     ) -> List[Dict[str, Any]]:
         """
         Advanced reranking yang mempertimbangkan baik nama maupun deskripsi.
@@ -118,6 +253,7 @@ class RerankingService:
             description_field: Field untuk deskripsi
             top_k: Jumlah hasil teratas
             description_weight: Bobot untuk deskripsi (0-1), sisanya untuk nama
+            description_max_tokens: Budget token deskripsi (None = RERANK_DESCRIPTION_MAX_TOKENS, 0 = tanpa batas)
         
         Returns:
             List hasil yang sudah direrank
@@ -125,13 +261,19 @@ class RerankingService:
         if not results:
             return []
         
-        # Score berdasarkan nama
+        if description_max_tokens is None:
+            description_max_tokens = config.RERANK_DESCRIPTION_MAX_TOKENS
+
+        # Pasangan nama dan deskripsi di-score dalam satu predict
+        # Deskripsi dipotong ke budget token hanya jika skornya belum ada di cache
         name_pairs = [[query, self._extract_text(r, name_field)] for r in results]
-        name_scores = self.model.predict(name_pairs)
-        
-        # Score berdasarkan deskripsi
         desc_pairs = [[query, self._extract_text(r, description_field)] for r in results]
-        desc_scores = self.model.predict(desc_pairs)
+        scores = self._score_pairs(
+            name_pairs + desc_pairs,
+            [0] * len(name_pairs) + [description_max_tokens] * len(desc_pairs)
+        )
+        name_scores = scores[:len(results)]
+        desc_scores = scores[len(results):]
         
         # Combine scores dengan weighted average
         for i, result in enumerate(results):
@@ -156,15 +298,36 @@ class RerankingService:
         return reranked_results
 
 
-# Singleton instance untuk reuse model
-_reranker_instance = None
+# Singleton instance dikelola model registry (eager/lazy loading + warm-up)
+registry.register(
+    "reranker",
+    RerankingService,
+    warmup=lambda reranker: reranker._model_predict([["warm up", "warm up"]])
+)
 
 def get_reranker() -> RerankingService:
     """
     Get atau create singleton instance dari RerankingService.
     Ini mencegah loading model berulang kali.
     """
-    global _reranker_instance
-    if _reranker_instance is None:
-        _reranker_instance = RerankingService()
-    return _reranker_instance
+    return registry.get("reranker")
+
+
+def reranker_batcher_stats() -> Dict[str, Any]:
+    """Statistik micro-batcher reranker (tanpa memaksa model di-load)."""
+    if not registry.is_loaded("reranker"):
+        return {"loaded": False}
+    reranker = registry.get("reranker")
+    if reranker._batcher is None:
+        return {"enabled": False}
+    return reranker._batcher.stats()
+
+
+def rerank_score_cache_stats() -> Dict[str, Any]:
+    """Hit rate score cache dan rata-rata pasangan yang benar-benar di-score per request."""
+    with _score_stats_lock:
+        stats = dict(_score_stats)
+    requests = stats["requests"]
+    stats["avg_pairs_requested"] = round(stats["pairs_requested"] / requests, 2) if requests else 0.0
+    stats["avg_pairs_scored"] = round(stats["pairs_scored"] / requests, 2) if requests else 0.0
+    return {"cache": _score_cache.stats(), **stats}
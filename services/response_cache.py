@@ -0,0 +1,267 @@
+"""
+Response cache untuk endpoint graph read (/places/{id}, /infobox/{id}, /packages, /packages/{id}).
+
+Body JSON di-cache per (generation, namespace, key) di backend yang bisa
+diganti: in-process LRU (default) atau Redis yang dipakai bersama semua
+worker (RESPONSE_CACHE_BACKEND=redis, butuh package `redis`). Setiap
+response membawa ETag dan Cache-Control, dan If-None-Match yang cocok
+dijawab 304 tanpa body.
+
+Invalidation memakai generation counter di Neo4j (:CacheState): job
+ingest / embedding memanggil invalidate_response_cache() setelah menulis
+data, dan setiap worker membaca generation paling lama tiap
+RESPONSE_CACHE_GENERATION_POLL detik, sehingga entry lama tidak terpakai lagi.
+"""
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+import config
+from database.neo4j_connection import async_neo4j
+from services.cache import LRUCache
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency
+    redis_asyncio = None
+
+_GENERATION_NAME = "response_cache"
+
+
+class Payload(NamedTuple):
+    """Loader result with extra response headers (e.g. X-Next-Cursor) cached together with the body."""
+    content: Any
+    headers: Dict[str, str]
+
+# Entry cache: (etag, body, extra headers)
+Entry = Tuple[str, bytes, Dict[str, str]]
+
+
+class ResponseCacheBackend(ABC):
+    """Storage for cached responses: (etag, body, headers) per key."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Entry]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Entry, ttl: float) -> None:
+        ...
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """Per-process LRU (services.cache.LRUCache)."""
+
+    def __init__(self, maxsize: int):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisBackend(ResponseCacheBackend):
+    """Shared cache across workers and instances. Redis errors are treated as cache misses."""
+
+    def __init__(self, url: str, prefix: str = "lancong:response:"):
+        if redis_asyncio is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires `pip install redis`")
+        self._client = redis_asyncio.from_url(url)
+        self._prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key):
+        try:
+            raw = await self._client.get(self._prefix + key)
+        except Exception:
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, headers, body = raw.split(b"\n", 2)
+        return etag.decode(), body, json.loads(headers)
+
+    async def set(self, key, value, ttl):
+        etag, body, headers = value
+        raw = etag.encode() + b"\n" + json.dumps(headers).encode() + b"\n" + body
+        try:
+            await self._client.set(self._prefix + key, raw, ex=max(1, int(ttl)))
+        except Exception:
+            self.errors += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _create_backend() -> ResponseCacheBackend:
+    if config.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(config.RESPONSE_CACHE_REDIS_URL)
+    return MemoryBackend(config.RESPONSE_CACHE_SIZE)
+
+
+_backend = _create_backend() if config.RESPONSE_CACHE_ENABLED else None
+_generation = 0
+_generation_checked = float("-inf")
+_not_modified = 0
+
+
+# === Generation / invalidation ===
+
+async def current_generation() -> int:
+    """Generation counter from Neo4j, re-read at most every RESPONSE_CACHE_GENERATION_POLL seconds."""
+    global _generation, _generation_checked
+    now = time.monotonic()
+    if now - _generation_checked < config.RESPONSE_CACHE_GENERATION_POLL:
+        return _generation
+    # Set sebelum await supaya request bersamaan tidak ikut query
+    _generation_checked = now
+    try:
+        rows = await async_neo4j.read(
+            "MATCH (s:CacheState {name: $name}) RETURN s.generation AS generation",
+            {"name": _GENERATION_NAME}
+        )
+        _generation = rows[0]["generation"] if rows else 0
+    except Exception as e:
+        # Neo4j tidak bisa dihubungi: tetap pakai generation terakhir
+        print(f"Response cache generation check failed: {type(e).__name__}: {e}")
+    return _generation
+
+
+_BUMP_GENERATION = """
+MERGE (s:CacheState {name: $name})
+SET s.generation = coalesce(s.generation, 0) + 1
+RETURN s.generation AS generation
+"""
+
+
+def invalidate_response_cache(conn) -> int:
+    """
+    Invalidate cached responses in every API worker. Called by batch jobs
+    (embedding.py, prefetch_wikidata.py) with the sync connection.
+
+    Returns:
+        The new generation
+    """
+    return conn.write(_BUMP_GENERATION, {"name": _GENERATION_NAME})[0]["generation"]
+
+
+async def invalidate_response_cache_async() -> int:
+    """Async variant for the API (POST /cache/invalidate); this worker sees it immediately."""
+    global _generation, _generation_checked
+    rows = await async_neo4j.write(_BUMP_GENERATION, {"name": _GENERATION_NAME})
+    _generation, _generation_checked = rows[0]["generation"], time.monotonic()
+    if _backend is not None:
+        _backend.clear()
+    return _generation
+
+
+# === HTTP ===
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _response(request: Request, etag: str, body: bytes, extra_headers: Dict[str, str], store: bool = True) -> Response:
+    global _not_modified
+    if not store:
+        # Data yang tidak di-cache server (mis. enrichment parsial) juga tidak boleh di-cache browser / CDN
+        return Response(content=body, media_type="application/json", headers={**extra_headers, "Cache-Control": "no-store"})
+    headers = {**extra_headers, "ETag": etag, "Cache-Control": f"public, max-age={config.RESPONSE_CACHE_MAX_AGE}"}
+    if _etag_matches(request, etag):
+        _not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _encode(data: Any) -> Entry:
+    content, headers = data if isinstance(data, Payload) else (data, {})
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.blake2b(body, digest_size=16)
+    digest.update(json.dumps(headers, sort_keys=True).encode())
+    return '"' + digest.hexdigest() + '"', body, headers
+
+
+def _is_cacheable(data: Any, cacheable: Optional[Callable[[Any], bool]]) -> bool:
+    return cacheable is None or cacheable(data.content if isinstance(data, Payload) else data)
+
+
+async def cached_response(
+    request: Request,
+    namespace: str,
+    key: Hashable,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Optional[float] = None,
+    cacheable: Optional[Callable[[Any], bool]] = None
+) -> Optional[Response]:
+    """
+    Serve a JSON response from the cache, or build it with `loader` and cache it.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        namespace: Endpoint name, e.g. "places"
+        key: Cache key within the namespace (e.g. the id plus query parameters)
+        loader: Coroutine function returning the response data (or a Payload with
+            extra headers), or None if not found
+        ttl: Time-to-live in seconds (default RESPONSE_CACHE_TTL)
+        cacheable: Optional check on the data; False = serve without caching, with
+            `Cache-Control: no-store` and no ETag (e.g. partial enrichment)
+
+    Returns:
+        Response with ETag / Cache-Control (304 if the client copy is current),
+        or None if `loader` returned None (not cached)
+    """
+    if _backend is None:
+        data = await loader()
+        return None if data is None else _response(request, *_encode(data), store=_is_cacheable(data, cacheable))
+
+    cache_key = f"{await current_generation()}:{namespace}:{key!r}"
+    entry = await _backend.get(cache_key)
+    if entry is None:
+        data = await loader()
+        if data is None:
+            return None
+        entry = _encode(data)
+        if not _is_cacheable(data, cacheable):
+            return _response(request, *entry, store=False)
+        await _backend.set(cache_key, entry, config.RESPONSE_CACHE_TTL if ttl is None else ttl)
+    return _response(request, *entry)
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    if _backend is None:
+        return {"enabled": False}
+    return {"enabled": True, "generation": _generation, "not_modified": _not_modified, **_backend.stats()}
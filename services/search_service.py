@@ -1,66 +1,372 @@
-from database.neo4j_connection import neo4j
-from sentence_transformers import SentenceTransformer
+import asyncio
+import base64
+import binascii
+import json
+import re
+from typing import List, Optional, Sequence, Tuple
+from neo4j.exceptions import ClientError
+import config
+from database.neo4j_connection import async_neo4j
+from models.schemas import VECTOR_FIELDS, PlaceFilter
+from services.cache import LRUCache
+from services.embedding_service import encode_query_async
 from services.reranking_service import get_reranker
-from services.wikidata import enrich_places_with_wikidata
+from services.singleflight import SingleFlight, single_flight
+from services.vector_index import vector_index
+from services.wikidata import enrich_places_with_wikidata_async
 
-def search_places(q: str, enrich: bool = True, max_enrich: int = 5):
+# Properti Place yang diproyeksikan di hasil search (embedding tidak ikut)
+PLACE_FIELDS = ("id", "name", "description", "city", "category", "price", "rating", "time_minutes", "lat", "long")
+# Hasil prefetch Wikidata, hanya diproyeksikan jika enrichment jalan (lalu di-pop dari payload)
+WIKIDATA_FIELDS = ("wikidata_image", "wikidata_item", "wikidata_description", "wikidata_fetched_at")
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Request search identik yang datang bersamaan berbagi satu komputasi (encode, query, rerank, enrichment)
+_search_flight = SingleFlight("search")
+
+def search_coalescing_stats():
+    return _search_flight.stats()
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
     """
-    Basic keyword search with optional Wikidata enrichment.
-    
-    Args:
-        q: Search query
-        enrich: Whether to enrich results with Wikidata (default: True)
-        max_enrich: Maximum number of results to enrich (default: 5)
+    Parse parameter `fields=a,b` (properti tambahan di luar PLACE_FIELDS).
+
+    Raises:
+        ValueError: Nama properti tidak valid atau berupa vector
     """
-    cypher = """
+    if not fields:
+        return ()
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    for name in names:
+        if not _FIELD_NAME.match(name):
+            raise ValueError(f"Invalid field name: '{name}'")
+        if name in VECTOR_FIELDS:
+            raise ValueError(f"Field '{name}' cannot be requested")
+    return names
+
+def _place_projection(var: str, fields: Sequence[str] = ()) -> str:
+    """Map projection Cypher, mis. `p { .id, .name, ... }`, untuk field default + `fields`."""
+    names = dict.fromkeys(PLACE_FIELDS + tuple(fields))
+    return var + " { " + ", ".join(f".{name}" for name in names) + " }"
+
+def _projected_fields(fields: Sequence[str], enrich: bool) -> Tuple[str, ...]:
+    """`fields` plus the stored Wikidata properties when the results will be enriched."""
+    return tuple(fields) + WIKIDATA_FIELDS if enrich else tuple(fields)
+
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+def build_fulltext_query(q: str, fuzzy: bool = True, prefix: bool = True) -> str:
+    """
+    Susun query Lucene dari input user: setiap kata wajib cocok (AND), dengan
+    boost untuk match di name, prefix match (`kata*`) untuk autocomplete dan
+    fuzzy match (`kata~1`) untuk typo.
+    """
+    clauses = []
+    for term in q.lower().split():
+        escaped = _LUCENE_SPECIAL.sub(r"\\\1", term)
+        options = [f"name:{escaped}^3", escaped]
+        if prefix:
+            options.append(f"{escaped}*")
+        if fuzzy and len(term) >= 4:
+            options.append(f"{escaped}~1")
+        clauses.append("(" + " OR ".join(options) + ")")
+    return " AND ".join(clauses)
+
+def encode_cursor(score: float, place_id: int) -> str:
+    """Cursor opaque untuk halaman berikutnya: posisi (score, id) item terakhir."""
+    return base64.urlsafe_b64encode(json.dumps([score, place_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Raises:
+        ValueError: Cursor tidak valid
+    """
+    try:
+        score, place_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), place_id
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+async def _fulltext_candidates(
+    q: str,
+    limit: int,
+    fields: Sequence[str] = (),
+    fuzzy: bool = True,
+    prefix: bool = True,
+    after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[dict, float]]:
+    """
+    Kandidat keyword search dari full-text index sebagai (place, score),
+    urut score tertinggi lalu id (stabil untuk keyset pagination).
+    """
+    lucene = build_fulltext_query(q, fuzzy, prefix)
+    if not lucene:
+        return []
+
+    after_score, after_id = after if after else (None, None)
+    cypher = f"""
+    CALL db.index.fulltext.queryNodes('place_fulltext_index', $lucene) YIELD node, score
+    WITH node, score
+    WHERE $after_score IS NULL
+       OR score < $after_score
+       OR (score = $after_score AND node.id > $after_id)
+    RETURN {_place_projection('node', fields)} AS place, score
+    ORDER BY score DESC, place.id ASC
+    LIMIT $limit
+    """
+    results = await async_neo4j.read(cypher, {
+        "lucene": lucene,
+        "after_score": after_score,
+        "after_id": after_id,
+        "limit": limit
+    })
+    return [(r["place"], r["score"]) for r in results]
+
+async def _scan_candidates(q: str, limit: int, fields: Sequence[str] = ()) -> List[Tuple[dict, float]]:
+    """Fallback tanpa full-text index (migrasi belum dijalankan): label scan CONTAINS."""
+    cypher = f"""
     MATCH (p:Place)
     WHERE toLower(p.name) CONTAINS toLower($q)
-    RETURN p { .* } AS place
-    LIMIT 20
+    RETURN {_place_projection('p', fields)} AS place
+    LIMIT $limit
     """
-    results = neo4j.query(cypher, {"q": q})
-    
-    if not enrich or not results:
-        return results
-    
-    # Extract places, enrich, and wrap back
-    places = [r.get('place', {}) for r in results]
-    enriched = enrich_places_with_wikidata(places, max_enrich)
-    return [{"place": place} for place in enriched]
+    results = await async_neo4j.read(cypher, {"q": q, "limit": limit})
+    return [(r["place"], None) for r in results]
 
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+_fulltext_warned = False
 
-def search_places_vector(q: str, top_k: int = 5, enrich: bool = True):
+async def _keyword_candidates(
+    q: str,
+    limit: int,
+    fields: Sequence[str] = (),
+    fuzzy: bool = True,
+    prefix: bool = True,
+    after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[dict, Optional[float]]]:
+    """Full-text candidates, falling back to the CONTAINS scan when the index is missing."""
+    global _fulltext_warned
+    try:
+        return await _fulltext_candidates(q, limit, fields, fuzzy, prefix, after)
+    except ClientError as e:
+        # Cukup sekali per proses, bukan di setiap search
+        if not _fulltext_warned:
+            _fulltext_warned = True
+            print(f"Full-text search failed, falling back to scan (run migrate.py?): {e.code}")
+        # Scan tidak punya urutan score, jadi tidak ada halaman berikutnya
+        return [] if after else await _scan_candidates(q, limit, fields)
+
+@single_flight(_search_flight)
+async def search_places(
+    q: str,
+    enrich: bool = True,
+    max_enrich: int = 5,
+    fields: Sequence[str] = (),
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fuzzy: bool = True,
+    prefix: bool = True
+) -> Tuple[List[dict], Optional[str]]:
     """
-    Semantic search with optional Wikidata enrichment.
+    Keyword search via full-text index (name, description, city, category),
+    diurutkan berdasarkan relevance score, with optional Wikidata enrichment.
     
     Args:
         q: Search query
-        top_k: Number of results to return
         enrich: Whether to enrich results with Wikidata (default: True)
+        max_enrich: Maximum number of results to enrich (default: 5)
+        fields: Extra Place properties to return (see parse_fields)
+        limit: Page size
+        cursor: Cursor dari halaman sebelumnya (None = halaman pertama)
+        fuzzy: Toleransi typo (edit distance 1)
+        prefix: Prefix match untuk kata yang belum selesai diketik
+    
+    Returns:
+        (results, next_cursor) - next_cursor None jika tidak ada halaman berikutnya
+
+    Raises:
+        ValueError: Cursor tidak valid
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # Ambil satu item ekstra untuk tahu apakah masih ada halaman berikutnya
+    candidates = await _keyword_candidates(q, limit + 1, _projected_fields(fields, enrich), fuzzy, prefix, after)
+
+    next_cursor = None
+    if len(candidates) > limit:
+        candidates = candidates[:limit]
+        last_place, last_score = candidates[-1]
+        # Hasil scan fallback (tanpa score) tidak bisa dipaginasi
+        if last_score is not None:
+            next_cursor = encode_cursor(last_score, last_place["id"])
+
+    places = []
+    for place, score in candidates:
+        if score is not None:
+            place["score"] = score
+        places.append(place)
+
+    if enrich and places:
+        places = await enrich_places_with_wikidata_async(places, max_enrich)
+    return [{"place": place} for place in places], next_cursor
+
+async def _hydrate_places(ids: List[int], fields: Sequence[str] = ()) -> List[dict]:
+    """Ambil properti Place untuk id hasil vector index lokal, urutan sesuai ids."""
+    cypher = f"""
+    UNWIND $ids AS id
+    MATCH (p:Place {{id: id}})
+    RETURN {_place_projection('p', fields)} AS place
+    """
+    results = await async_neo4j.read(cypher, {"ids": ids})
+    by_id = {r["place"].get("id"): r["place"] for r in results}
+    return [by_id[place_id] for place_id in ids if place_id in by_id]
+
+def _filter_clause(var: str, filters: PlaceFilter) -> Tuple[str, dict]:
+    """WHERE clause Cypher (tanpa keyword WHERE) + parameter untuk PlaceFilter."""
+    conditions, params = [], {}
+    if filters.city is not None:
+        conditions.append(f"toLower({var}.city) = toLower($filter_city)")
+        params["filter_city"] = filters.city
+    if filters.category is not None:
+        conditions.append(f"toLower({var}.category) = toLower($filter_category)")
+        params["filter_category"] = filters.category
+    if filters.min_price is not None:
+        conditions.append(f"{var}.price >= $filter_min_price")
+        params["filter_min_price"] = filters.min_price
+    if filters.max_price is not None:
+        conditions.append(f"{var}.price <= $filter_max_price")
+        params["filter_max_price"] = filters.max_price
+    if filters.min_rating is not None:
+        conditions.append(f"{var}.rating >= $filter_min_rating")
+        params["filter_min_rating"] = filters.min_rating
+    return " AND ".join(conditions) or "true", params
+
+# id Place yang lolos filter, untuk pre-filtered search di index lokal
+_eligible_ids_cache = LRUCache(maxsize=256, ttl=config.VECTOR_FILTER_CACHE_TTL)
+
+async def _eligible_ids(filters: PlaceFilter) -> List[int]:
+    key = filters.model_dump_json()
+    ids = _eligible_ids_cache.get(key)
+    if ids is None:
+        clause, params = _filter_clause("p", filters)
+        result = await async_neo4j.read(
+            f"MATCH (p:Place) WHERE {clause} RETURN collect(p.id) AS ids", params
+        )
+        ids = result[0]["ids"] if result else []
+        _eligible_ids_cache.set(key, ids)
+    return ids
+
+async def _vector_candidates(
+    q: str,
+    k: int,
+    fields: Sequence[str] = (),
+    filters: Optional[PlaceFilter] = None
+) -> List[Tuple[dict, float]]:
+    """
+    Top-k kandidat semantic search sebagai (place, score), hanya Place yang lolos `filters`.
+
+    Dengan VECTOR_SEARCH_BACKEND=local kandidat dipilih oleh index in-process
+    (exact search dibatasi ke id yang lolos filter) dan Neo4j hanya
+    meng-hydrate k node tersebut. Selain itu (atau selama index lokal belum
+    siap) memakai db.index.vector.queryNodes dengan adaptive over-fetch:
+    jumlah kandidat ANN diperbesar sampai k hasil lolos filter atau
+    max(VECTOR_FILTER_MAX_CANDIDATES, k) tercapai.
     """
-    embedding = model.encode(q).tolist()
+    embedding = await encode_query_async(q)
+    if filters is not None and filters.is_empty():
+        filters = None
 
-    cypher = """
+    if config.VECTOR_SEARCH_BACKEND == "local" and vector_index.is_ready():
+        allowed_ids = await _eligible_ids(filters) if filters else None
+        hits = vector_index.search(embedding, k, allowed_ids)
+        scores = dict(hits)
+        places = await _hydrate_places([place_id for place_id, _ in hits], fields)
+        return [(place, scores[place["id"]]) for place in places]
+
+    clause, params = _filter_clause("node", filters) if filters else ("true", {})
+    cypher = f"""
     CALL db.index.vector.queryNodes(
         'place_embedding_index',
-        $top_k,
+        $fetch_k,
         $embedding
     ) YIELD node, score
-    RETURN node { .* , score: score } AS place
+    WITH node, score
+    WHERE {clause}
+    RETURN {_place_projection('node', fields)} AS place, score
+    LIMIT $k
     """
+    params.update({"k": k, "embedding": embedding.tolist()})
+
+    # Batas kandidat minimal k, supaya initial_k besar tetap mendapat k kandidat
+    max_candidates = max(config.VECTOR_FILTER_MAX_CANDIDATES, k)
+    fetch_k = k
+    if filters:
+        fetch_k = min(max(k * config.VECTOR_FILTER_OVERFETCH, k), max_candidates)
+    while True:
+        results = await async_neo4j.read(cypher, {**params, "fetch_k": fetch_k})
+        if len(results) >= k or not filters or fetch_k >= max_candidates:
+            break
+        fetch_k = min(fetch_k * max(config.VECTOR_FILTER_OVERFETCH, 2), max_candidates)
+    return [(r["place"], r["score"]) for r in results]
 
-    results = neo4j.query(cypher, {"top_k": top_k, "embedding": embedding})
+async def _rerank(q: str, places: List[dict], top_k: int, use_description: bool = True) -> List[dict]:
+    """Rerank dengan cross-encoder: name + description jika tersedia, selain itu name saja."""
+    reranker = await asyncio.to_thread(get_reranker)
     
-    if not enrich or not results:
-        return results
+    if use_description and any(p.get('description') for p in places):
+        # Use advanced reranking with description
+        return await asyncio.to_thread(
+            reranker.rerank_with_description,
+            query=q,
+            results=places,
+            name_field='name',
+            description_field='description',
+            top_k=top_k,
+            description_weight=0.3
+        )
+    # Fallback to simple reranking
+    return await asyncio.to_thread(
+        reranker.rerank,
+        query=q,
+        results=places,
+        text_field='name',
+        top_k=top_k
+    )
+
+@single_flight(_search_flight)
+async def search_places_vector(
+    q: str,
+    top_k: int = 5,
+    enrich: bool = True,
+    fields: Sequence[str] = (),
+    filters: Optional[PlaceFilter] = None
+):
+    """
+    Semantic search with optional Wikidata enrichment.
     
-    # Extract places, enrich, and wrap back
-    places = [r.get('place', {}) for r in results]
-    enriched = enrich_places_with_wikidata(places, top_k)
+    Args:
+        q: Search query
+        top_k: Number of results to return
+        enrich: Whether to enrich results with Wikidata (default: True)
+        fields: Extra Place properties to return (see parse_fields)
+        filters: Only return Places matching these attributes
+    """
+    candidates = await _vector_candidates(q, top_k, _projected_fields(fields, enrich), filters)
+    places = [{**place, "score": score} for place, score in candidates]
+
+    if not enrich or not places:
+        return [{"place": place} for place in places]
+
+    # Enrich and wrap back
+    enriched = await enrich_places_with_wikidata_async(places, top_k)
     return [{"place": place} for place in enriched]
 
-def search_places_with_reranking(q: str, initial_k: int = 20, top_k: int = 5):
+@single_flight(_search_flight)
+async def search_places_with_reranking(
+    q: str,
+    initial_k: int = 20,
+    top_k: int = 5,
+    fields: Sequence[str] = (),
+    filters: Optional[PlaceFilter] = None
+):
     """
     Semantic search dengan reranking menggunakan cross-encoder.
     
@@ -73,54 +379,41 @@ def search_places_with_reranking(q: str, initial_k: int = 20, top_k: int = 5):
         q: Query pencarian
         initial_k: Jumlah kandidat awal dari vector search (lebih banyak = lebih baik tapi lebih lambat)
         top_k: Jumlah hasil akhir setelah reranking
+        fields: Properti Place tambahan yang dikembalikan
+        filters: Filter atribut Place, diterapkan sebelum reranking
     
     Returns:
         List tempat wisata yang sudah direrank berdasarkan relevance score
     """
     # Step 1: Get initial candidates using vector search
-    embedding = model.encode(q).tolist()
-    
-    cypher = """
-    CALL db.index.vector.queryNodes(
-        'place_embedding_index',
-        $initial_k,
-        $embedding
-    ) YIELD node, score
-    RETURN node { .* } AS place, score AS vector_score
-    """
-    
-    candidates = neo4j.query(cypher, {"initial_k": initial_k, "embedding": embedding})
+    candidates = await _vector_candidates(q, initial_k, _projected_fields(fields, True), filters)
     
     if not candidates:
         return []
     
     # Step 2: Extract places for reranking
     places_to_rerank = []
-    for candidate in candidates:
-        place = candidate.get('place', {})
-        place['vector_score'] = candidate.get('vector_score', 0)
+    for place, vector_score in candidates:
+        place['vector_score'] = vector_score
         places_to_rerank.append(place)
     
     # Step 3: Rerank berdasarkan name
-    reranker = get_reranker()
-    reranked = reranker.rerank(
-        query=q,
-        results=places_to_rerank,
-        text_field='name',
-        top_k=top_k
-    )
+    reranked = await _rerank(q, places_to_rerank, top_k, use_description=False)
     
     # Step 4: Enrich top results with Wikidata
-    enriched = enrich_places_with_wikidata(reranked, max_enrich=top_k)
+    enriched = await enrich_places_with_wikidata_async(reranked, max_enrich=top_k)
     
     # Wrap kembali dalam format yang konsisten dengan endpoint lain
     return [{"place": place} for place in enriched]
 
-def search_places_with_advanced_reranking(
+@single_flight(_search_flight)
+async def search_places_with_advanced_reranking(
     q: str, 
     initial_k: int = 20, 
     top_k: int = 5,
-    use_description: bool = True
+    use_description: bool = True,
+    fields: Sequence[str] = (),
+    filters: Optional[PlaceFilter] = None
 ):
     """
     Advanced semantic search dengan reranking yang mempertimbangkan deskripsi.
@@ -131,57 +424,106 @@ def search_places_with_advanced_reranking(
         initial_k: Jumlah kandidat awal
         top_k: Jumlah hasil akhir
         use_description: Apakah menggunakan deskripsi dalam reranking
+        fields: Properti Place tambahan yang dikembalikan
+        filters: Filter atribut Place, diterapkan sebelum reranking
     
     Returns:
         List tempat wisata yang sudah direrank
     """
     # Get initial candidates
-    embedding = model.encode(q).tolist()
-    
-    cypher = """
-    CALL db.index.vector.queryNodes(
-        'place_embedding_index',
-        $initial_k,
-        $embedding
-    ) YIELD node, score
-    RETURN node { .* } AS place, score AS vector_score
-    """
-    
-    candidates = neo4j.query(cypher, {"initial_k": initial_k, "embedding": embedding})
+    candidates = await _vector_candidates(q, initial_k, _projected_fields(fields, True), filters)
     
     if not candidates:
         return []
     
     # Extract places
     places_to_rerank = []
-    for candidate in candidates:
-        place = candidate.get('place', {})
-        place['vector_score'] = candidate.get('vector_score', 0)
+    for place, vector_score in candidates:
+        place['vector_score'] = vector_score
         places_to_rerank.append(place)
     
     # Rerank
-    reranker = get_reranker()
-    
-    if use_description and any('description' in p for p in places_to_rerank):
-        # Use advanced reranking with description
-        reranked = reranker.rerank_with_description(
-            query=q,
-            results=places_to_rerank,
-            name_field='name',
-            description_field='description',
-            top_k=top_k,
-            description_weight=0.3
-        )
-    else:
-        # Fallback to simple reranking
-        reranked = reranker.rerank(
-            query=q,
-            results=places_to_rerank,
-            text_field='name',
-            top_k=top_k
-        )
+    reranked = await _rerank(q, places_to_rerank, top_k, use_description)
     
     # Enrich top results with Wikidata
-    enriched = enrich_places_with_wikidata(reranked, max_enrich=top_k)
+    enriched = await enrich_places_with_wikidata_async(reranked, max_enrich=top_k)
+    
+    return [{"place": place} for place in enriched]
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[dict, Optional[float]]]],
+    k: int = 60
+) -> List[Tuple[dict, float]]:
+    """
+    Reciprocal rank fusion: score(d) = sum 1 / (k + rank_i(d)) over all rankings.
+    Hanya memakai posisi, sehingga score BM25 dan cosine tidak perlu dinormalisasi.
+
+    Returns:
+        (place, fused_score) sorted by fused_score, properti place dari semua ranking digabung
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (place, _) in enumerate(ranking, start=1):
+            entry = fused.get(place["id"])
+            if entry is None:
+                fused[place["id"]] = entry = [place, 0.0]
+            else:
+                entry[0].update(place)
+            entry[1] += 1.0 / (k + rank)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda entry: entry[1], reverse=True)
+
+@single_flight(_search_flight)
+async def search_places_hybrid(
+    q: str,
+    initial_k: int = 20,
+    top_k: int = 5,
+    rerank: bool = False,
+    use_description: bool = True,
+    enrich: bool = True,
+    fields: Sequence[str] = ()
+):
+    """
+    Hybrid search: kandidat full-text dan vector diambil bersamaan,
+    digabung dengan reciprocal rank fusion, lalu (opsional) direrank.
+    
+    Args:
+        q: Query pencarian
+        initial_k: Jumlah kandidat dari masing-masing retriever (dan maksimum kandidat untuk reranking)
+        top_k: Jumlah hasil akhir
+        rerank: Rerank hasil fusion dengan cross-encoder
+        use_description: Gunakan deskripsi dalam reranking
+        enrich: Enrich hasil dengan Wikidata
+        fields: Properti Place tambahan yang dikembalikan
     
-    return [{"place": place} for place in enriched]
\ No newline at end of file
+    Returns:
+        List tempat wisata, urut berdasarkan fused_score (atau rerank_score)
+    """
+    projected = _projected_fields(fields, enrich)
+    keyword, vector = await asyncio.gather(
+        _keyword_candidates(q, initial_k, projected),
+        _vector_candidates(q, initial_k, projected)
+    )
+
+    # Simpan score asli masing-masing retriever untuk debugging relevance
+    for place, score in keyword:
+        place['keyword_score'] = score
+    for place, score in vector:
+        place['vector_score'] = score
+
+    fused = reciprocal_rank_fusion([keyword, vector], k=config.HYBRID_RRF_K)
+    places = []
+    for place, fused_score in fused:
+        place['fused_score'] = fused_score
+        places.append(place)
+
+    if not places:
+        return []
+
+    if rerank:
+        places = await _rerank(q, places[:initial_k], top_k, use_description)
+    else:
+        places = places[:top_k]
+
+    if enrich:
+        places = await enrich_places_with_wikidata_async(places, max_enrich=top_k)
+    return [{"place": place} for place in places]
@@ -0,0 +1,90 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable
+
+from pydantic import BaseModel
+
+import config
+from services.cache import normalize_key
+
+
+class SingleFlight:
+    """
+    Request coalescing (single-flight) untuk coroutine.
+
+    Concurrent calls with the same key share one in-flight computation:
+    the first caller starts it as a task, later callers await the same task.
+    The task is shielded, so a disconnecting caller does not cancel the work
+    for the others. Results are shared between callers and must be treated
+    as read-only.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+def _key_part(value: Any) -> Hashable:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _key_part(item)) for key, item in value.items()))
+    return value
+
+
+def single_flight(flight: SingleFlight, normalize: Iterable[str] = ("q",)):
+    """
+    Decorator: coalesce concurrent calls of an async function with equal arguments.
+
+    Args:
+        flight: SingleFlight instance holding the in-flight calls and metrics
+        normalize: Free-text arguments normalized with normalize_key for the key
+            (case / whitespace insensitive, like the embedding and rerank caches)
+    """
+    normalize = frozenset(normalize)
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not config.SEARCH_COALESCING:
+                return await fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__name__,) + tuple(
+                normalize_key(value) if name in normalize else _key_part(value)
+                for name, value in bound.arguments.items()
+            )
+            return await flight.do(key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
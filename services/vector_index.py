@@ -0,0 +1,347 @@
+"""
+In-process vector index atas embedding Place (VECTOR_SEARCH_BACKEND=local).
+
+Exact cosine similarity via satu NumPy matmul - untuk katalog wisata
+(ratusan s/d puluhan ribu Place) ini lebih cepat daripada round-trip ke
+db.index.vector.queryNodes, dan Neo4j hanya dipakai untuk hydrate hasil akhir.
+
+Snapshot disimpan sebagai file .npy (di-load memory-mapped saat startup)
+lalu di-refresh secara incremental berdasarkan p.embedding_updated_at.
+
+Setiap snapshot ditulis ke direktori versi sendiri (<path>.<versi>/) dan
+dipublikasikan dengan mengganti satu file pointer (<path>.current) secara
+atomik, sehingga ids, vectors dan meta selalu berasal dari snapshot yang sama.
+Hanya satu proses (pemegang lock <path>.lock) yang refresh ke Neo4j dan
+menulis snapshot; worker lain cukup me-load versi terbaru.
+"""
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Jumlah direktori snapshot yang disimpan (versi terbaru + versi lama yang mungkin masih di-mmap worker lain)
+KEEP_SNAPSHOTS = 3
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class LocalVectorIndex:
+    """Exact cosine-similarity index over Place embeddings."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot prefix: versions in <path>.<version>/ (ids.npy, vectors.npy,
+                meta.json), the current version in <path>.current, the writer lock in <path>.lock
+        """
+        self.path = path
+        # (ids, vectors, id -> row) di-swap sekaligus supaya search tidak pernah melihat state setengah jadi
+        self._state: Optional[Tuple[np.ndarray, np.ndarray, dict]] = None
+        self.watermark = 0
+        self.version: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._writer_fd: Optional[int] = None
+        # True jika state berubah sejak snapshot terakhir di-load / disimpan
+        self.dirty = False
+
+    def is_loaded(self) -> bool:
+        return self._state is not None
+
+    def is_ready(self) -> bool:
+        """Loaded and non-empty; an empty index makes search fall back to Neo4j."""
+        return self._state is not None and len(self._state[0]) > 0
+
+    def __len__(self) -> int:
+        return 0 if self._state is None else len(self._state[0])
+
+    def _set_state(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        id_pos = {int(place_id): row for row, place_id in enumerate(ids)}
+        self._state = (ids, vectors, id_pos)
+        self.refreshed_at = time.time()
+        self.dirty = True
+
+    # === Writer lock ===
+
+    def acquire_writer(self) -> bool:
+        """
+        Try to become the single process that refreshes from Neo4j and saves snapshots.
+        The OS lock is held for the life of the process and released automatically if it dies.
+        """
+        if self._writer_fd is not None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._writer_fd = fd
+        return True
+
+    def is_writer(self) -> bool:
+        return self._writer_fd is not None
+
+    # === Snapshot ===
+
+    def current_version(self) -> Optional[str]:
+        """Version published in the pointer file, or None if there is no snapshot yet."""
+        try:
+            with open(self.path + ".current") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def load(self) -> bool:
+        """
+        Load the current snapshot memory-mapped. Returns False if it is missing,
+        made with another model, or inconsistent (ids / vectors / meta counts differ).
+        """
+        version = self.current_version()
+        if version is None:
+            return False
+        directory = f"{self.path}.{version}"
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("model") != config.EMBEDDING_MODEL_NAME:
+                return False
+            ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+            vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return False
+
+        if ids.ndim != 1 or vectors.ndim != 2 or not len(ids) == len(vectors) == meta.get("count"):
+            print(f"Local vector index snapshot {version} is inconsistent, ignoring it")
+            return False
+
+        with self._lock:
+            self.watermark = meta.get("watermark", 0)
+            self.version = version
+            self._set_state(ids, vectors)
+            self.dirty = False
+        return True
+
+    def save(self) -> None:
+        """
+        Write the state as a new snapshot version, then publish it by atomically
+        replacing the pointer file. Only the writer process calls this.
+        """
+        if self._state is None:
+            return
+        ids, vectors, _ = self._state
+        version = f"{time.time_ns()}-{os.getpid()}"
+        directory = f"{self.path}.{version}"
+        tmp = f"{directory}.tmp"
+        os.makedirs(tmp)
+
+        np.save(os.path.join(tmp, "ids.npy"), np.asarray(ids))
+        np.save(os.path.join(tmp, "vectors.npy"), np.asarray(vectors))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({
+                "model": config.EMBEDDING_MODEL_NAME,
+                "watermark": self.watermark,
+                "count": len(ids),
+                "dim": int(vectors.shape[1]) if len(ids) else 0
+            }, f)
+        os.rename(tmp, directory)
+
+        pointer = f"{self.path}.current.{os.getpid()}.tmp"
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, self.path + ".current")
+        self.version = version
+        self.dirty = False
+        self._prune_snapshots()
+
+    def _prune_snapshots(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + "."
+        versions = sorted(
+            name[len(prefix):] for name in os.listdir(directory)
+            if name.startswith(prefix) and os.path.isdir(os.path.join(directory, name))
+            and not name.endswith(".tmp")
+        )
+        for version in versions[:-KEEP_SNAPSHOTS]:
+            shutil.rmtree(f"{self.path}.{version}", ignore_errors=True)
+
+    # === Build / refresh dari Neo4j ===
+
+    def _fetch(self, conn, since: int) -> Iterable[dict]:
+        return conn.stream(
+            """
+            MATCH (p:Place)
+            WHERE p.embedding IS NOT NULL AND coalesce(p.embedding_updated_at, 0) > $since
+            RETURN p.id AS id, p.embedding AS embedding, coalesce(p.embedding_updated_at, 0) AS updated_at
+            """,
+            {"since": since}
+        )
+
+    def build(self, conn) -> None:
+        """Full rebuild from Neo4j."""
+        ids, vectors, watermark = [], [], 0
+        for row in self._fetch(conn, -1):
+            ids.append(row["id"])
+            vectors.append(row["embedding"])
+            watermark = max(watermark, row["updated_at"])
+
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32)) if vectors else np.zeros((0, 0), np.float32)
+        with self._lock:
+            self.watermark = watermark
+            self._set_state(np.asarray(ids, dtype=np.int64), vectors)
+
+    def refresh(self, conn) -> int:
+        """
+        Merge Places whose embedding changed since the last refresh.
+        Falls back to a full rebuild when Places were removed.
+
+        Returns:
+            Number of rows added or updated
+        """
+        if self._state is None:
+            self.build(conn)
+            return len(self)
+
+        rows = list(self._fetch(conn, self.watermark))
+        total = conn.read("MATCH (p:Place) WHERE p.embedding IS NOT NULL RETURN count(p) AS n")[0]["n"]
+
+        if rows:
+            with self._lock:
+                ids, vectors, id_pos = self._state
+                # Copy dari memmap hanya ketika memang ada perubahan
+                ids = np.array(ids)
+                vectors = np.array(vectors)
+                new_ids, new_vectors = [], []
+                for row in rows:
+                    vector = _normalize(np.asarray(row["embedding"], dtype=np.float32))
+                    pos = id_pos.get(int(row["id"]))
+                    if pos is None:
+                        new_ids.append(row["id"])
+                        new_vectors.append(vector)
+                    else:
+                        vectors[pos] = vector
+                    self.watermark = max(self.watermark, row["updated_at"])
+                if new_ids:
+                    ids = np.concatenate([ids, np.asarray(new_ids, dtype=np.int64)])
+                    new_vectors = np.asarray(new_vectors, dtype=np.float32)
+                    vectors = np.vstack([vectors, new_vectors]) if len(vectors) else new_vectors
+                self._set_state(ids, vectors)
+
+        if total != len(self):
+            self.build(conn)
+            return len(self)
+
+        self.refreshed_at = time.time()
+        return len(rows)
+
+    # === Query ===
+
+    def search(self, query: np.ndarray, k: int, allowed_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k Places by cosine similarity.
+
+        Args:
+            query: Query embedding
+            k: Number of results
+            allowed_ids: Only consider these Places (pre-filtered exact search)
+
+        Returns:
+            List of (place_id, score) with score in [0, 1], the same scale as
+            Neo4j's cosine vector index ((1 + cos) / 2)
+        """
+        state = self._state
+        if state is None or k <= 0:
+            return []
+        ids, vectors, id_pos = state
+        if len(ids) == 0:
+            return []
+
+        if allowed_ids is None:
+            rows = None
+            candidates = vectors
+        else:
+            rows = np.fromiter((id_pos[i] for i in allowed_ids if i in id_pos), dtype=np.int64)
+            if len(rows) == 0:
+                return []
+            candidates = vectors[rows]
+
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        similarities = np.clip(candidates @ q, -1.0, 1.0)
+        k = min(k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        top_rows = top if rows is None else rows[top]
+        return [(int(ids[row]), float((1.0 + sim) / 2.0)) for row, sim in zip(top_rows, similarities[top])]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "loaded": self.is_loaded(),
+            "size": len(self),
+            "watermark": self.watermark,
+            "version": self.version,
+            "writer": self.is_writer(),
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+vector_index = LocalVectorIndex(config.VECTOR_INDEX_PATH)
+
+
+def sync(conn) -> None:
+    """
+    One refresh step. The writer process loads the snapshot (or rebuilds it when
+    it is missing or inconsistent), merges changes from Neo4j and saves a new
+    version when something changed; other processes only load the latest
+    published version.
+    """
+    if vector_index.acquire_writer():
+        if not vector_index.is_loaded():
+            if vector_index.load():
+                vector_index.refresh(conn)
+            else:
+                vector_index.build(conn)
+        else:
+            vector_index.refresh(conn)
+        # Snapshot baru hanya ditulis jika build / refresh benar-benar mengubah index
+        if vector_index.dirty:
+            vector_index.save()
+        return
+
+    version = vector_index.current_version()
+    if version is not None and version != vector_index.version:
+        vector_index.load()
+
+
+async def keep_fresh(conn, interval: float) -> None:
+    """Background task: load the index at startup, then keep it fresh every `interval` seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(sync, conn)
+        except Exception as e:
+            # Selama index belum siap, search otomatis fallback ke Neo4j vector index
+            print(f"Local vector index refresh failed: {type(e).__name__}: {e}")
+        # Worker non-writer menunggu snapshot pertama dari writer: cek lebih sering
+        await asyncio.sleep(interval if vector_index.is_ready() else min(interval, 5))
@@ -1,7 +1,33 @@
 from SPARQLWrapper import SPARQLWrapper, JSON
-from typing import Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+import config
+from services.wikidata_cache import get_wikidata_cache, normalize_place_name
 
-def fetch_wikidata_image(place_name: str):
+# Thread pool bersama: membatasi jumlah SPARQL request yang in-flight di seluruh proses
+_executor = ThreadPoolExecutor(
+    max_workers=config.WIKIDATA_MAX_CONCURRENCY,
+    thread_name_prefix="wikidata"
+)
+
+# Lookup yang sedang antre / berjalan per nama (ternormalisasi): request lain menunggu future yang sama
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_fetch_stats = {"pending": 0, "submitted": 0, "joined": 0, "dropped": 0}
+
+
+def _escape_sparql_literal(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _query_wikidata(place_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Run the EntitySearch SPARQL query for a single place name.
+    Returns None when Wikidata has no match; raises on network/endpoint errors.
+    """
     sparql = SPARQLWrapper("https://query.wikidata.org/sparql")
     
     query = f"""
@@ -15,7 +41,7 @@ def fetch_wikidata_image(place_name: str):
       SERVICE wikibase:mwapi {{
           bd:serviceParam wikibase:endpoint "www.wikidata.org";
                           wikibase:api "EntitySearch";
-                          mwapi:search "{place_name}";
+                          mwapi:search "{_escape_sparql_literal(place_name)}";
                           mwapi:language "id".
           ?item wikibase:apiOutputItem mwapi:item.
       }}
@@ -34,67 +60,344 @@ def fetch_wikidata_image(place_name: str):
 
     sparql.setQuery(query)
     sparql.setReturnFormat(JSON)
+    sparql.setTimeout(config.WIKIDATA_TIMEOUT)
+    results = sparql.query().convert()
+    bindings = results["results"]["bindings"]
+    if len(bindings) > 0:
+        item = bindings[0]
+        return {
+            "image": item.get("image", {}).get("value"),
+            "wikidata_entity": item.get("item", {}).get("value"),
+            "description_id": item.get("description", {}).get("value")
+        }
+    return None
+
+
+def _fetch_and_cache(place_name: str) -> Optional[Dict[str, Any]]:
+    """Query Wikidata for one name and store the outcome in the cache."""
+    cache = get_wikidata_cache()
     try:
-        results = sparql.query().convert()
-        bindings = results["results"]["bindings"]
-        if len(bindings) > 0:
-            item = bindings[0]
-            return {
-                "image": item.get("image", {}).get("value"),
-                "wikidata_entity": item.get("item", {}).get("value"),
-                "description_id": item.get("description", {}).get("value")
-            }
-    except:
+        result = _query_wikidata(place_name)
+    except Exception:
+        # Error juga di-cache (TTL pendek) supaya endpoint yang sedang down tidak dipanggil terus
+        if cache is not None:
+            cache.set(place_name, None, ttl=config.WIKIDATA_CACHE_ERROR_TTL)
         return None
-    return None
+
+    if cache is not None:
+        cache.set(place_name, result)
+    return result
+
+
+def query_wikidata_batch(place_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Resolve many place names with a single SPARQL request.
+
+    The names are bound through a VALUES block into the EntitySearch MWAPI
+    call; for every name the best-ranked item (lowest apiOrdinal) is kept.
+    `wikibase:limit 1` stops MWAPI after the top hit per name, so common names
+    do not page through search continuations.
+    Names without bindings map to None. Raises on network/endpoint errors.
+    """
+    sparql = SPARQLWrapper("https://query.wikidata.org/sparql")
+    values = " ".join(f'"{_escape_sparql_literal(name)}"' for name in place_names)
+
+    query = f"""
+    PREFIX wdt: <http://www.wikidata.org/prop/direct/>
+    PREFIX schema: <http://schema.org/>
+    PREFIX wikibase: <http://wikiba.se/ontology#>
+    PREFIX bd: <http://www.bigdata.com/rdf#>
+    PREFIX mwapi: <https://www.mediawiki.org/ontology#API/>
+
+    SELECT ?search ?item ?ordinal ?image ?description WHERE {{
+      VALUES ?search {{ {values} }}
+
+      SERVICE wikibase:mwapi {{
+          bd:serviceParam wikibase:endpoint "www.wikidata.org";
+                          wikibase:api "EntitySearch";
+                          wikibase:limit 1;
+                          mwapi:search ?search;
+                          mwapi:language "id".
+          ?item wikibase:apiOutputItem mwapi:item.
+          ?ordinal wikibase:apiOrdinal true.
+      }}
+
+      OPTIONAL {{ ?item wdt:P18 ?image. }}
+
+      OPTIONAL {{ 
+        ?item schema:description ?description. 
+        FILTER(LANG(?description) = "id") 
+      }}
+    }}
+    """
+
+    sparql.setQuery(query)
+    sparql.setReturnFormat(JSON)
+    sparql.setTimeout(config.WIKIDATA_TIMEOUT)
+    results = sparql.query().convert()
+
+    best: Dict[str, tuple] = {}
+    for item in results["results"]["bindings"]:
+        name = item.get("search", {}).get("value")
+        if name is None:
+            continue
+        ordinal = int(item.get("ordinal", {}).get("value", 0))
+        # Ambil hasil EntitySearch peringkat teratas (sama seperti LIMIT 1 pada query tunggal)
+        if name in best and best[name][0] <= ordinal:
+            continue
+        best[name] = (ordinal, {
+            "image": item.get("image", {}).get("value"),
+            "wikidata_entity": item.get("item", {}).get("value"),
+            "description_id": item.get("description", {}).get("value")
+        })
+
+    return {name: best[name][1] if name in best else None for name in place_names}
+
+
+def _fetch_and_cache_batch(place_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Query Wikidata for many names in one request and store the outcomes in the cache."""
+    cache = get_wikidata_cache()
+    try:
+        fetched = query_wikidata_batch(place_names)
+    except Exception:
+        if cache is not None:
+            for name in place_names:
+                cache.set(name, None, ttl=config.WIKIDATA_CACHE_ERROR_TTL)
+        return {name: None for name in place_names}
+
+    if cache is not None:
+        for name, result in fetched.items():
+            cache.set(name, result)
+    return fetched
+
+
+def pop_stored_wikidata(place: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Remove the Wikidata properties materialized on a Place node (see
+    prefetch_wikidata.py) from a place dict.
+
+    Returns:
+        The stored Wikidata info if it is present and not older than
+        WIKIDATA_STORED_TTL, otherwise None (caller should go live)
+    """
+    fetched_at = place.pop("wikidata_fetched_at", None)
+    stored = {
+        "image": place.pop("wikidata_image", None),
+        "wikidata_entity": place.pop("wikidata_item", None),
+        "description_id": place.pop("wikidata_description", None)
+    }
+    if fetched_at is None or time.time() - fetched_at > config.WIKIDATA_STORED_TTL:
+        return None
+    return stored
+
+
+def _apply_external(place: Dict[str, Any], external: Optional[Dict[str, Any]]) -> None:
+    external = external or {}
+    place["image"] = external.get("image")
+    place["wikidata_entity"] = external.get("wikidata_entity")
+    place["description_id"] = external.get("description_id")
+
+
+def _start_enrichment(places: List[Dict[str, Any]], max_enrich: int):
+    """
+    Resolve everything that can be answered without blocking: properties
+    stored on the Place nodes and the in-memory cache tier.
+
+    Returns:
+        (stored, resolved, missing) - missing names still need the disk
+        cache (_lookup_disk) and then Wikidata (_submit_fetches)
+    """
+    # Data yang sudah di-prefetch ke node Place dipakai tanpa external call
+    stored = [pop_stored_wikidata(place) for place in places]
+
+    cache = get_wikidata_cache()
+    resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+    missing: List[str] = []
+
+    for i, place in enumerate(places[:max_enrich]):
+        name = place.get("name") or ""
+        if stored[i] is not None or not name or name in resolved or name in missing:
+            continue
+        if cache is not None:
+            found, cached = cache.peek(name)
+            if found:
+                resolved[name] = cached
+                continue
+        missing.append(name)
+
+    return stored, resolved, missing
 
 
-def enrich_place_with_wikidata(place: Dict[str, Any]) -> Dict[str, Any]:
+def _lookup_disk(missing: List[str], resolved: Dict[str, Optional[Dict[str, Any]]]) -> List[str]:
+    """Answer names from the SQLite cache tier in one query (blocking). Returns the names still missing."""
+    cache = get_wikidata_cache()
+    if cache is None or not missing:
+        return missing
+    found = cache.get_many(missing)
+    resolved.update(found)
+    return [name for name in missing if name not in found]
+
+
+def _fetch_task(place_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Pool task: resolve names from Wikidata; the result is keyed by normalized name."""
+    if config.WIKIDATA_ENRICH_MODE == "batch":
+        fetched = _fetch_and_cache_batch(place_names)
+    else:
+        fetched = {name: _fetch_and_cache(name) for name in place_names}
+    return {normalize_place_name(name): result for name, result in fetched.items()}
+
+
+def _release(future: Future, keys: List[str]) -> None:
+    with _inflight_lock:
+        _fetch_stats["pending"] -= 1
+        for key in keys:
+            if _inflight.get(key) is future:
+                del _inflight[key]
+
+
+def _submit_fetches(missing: List[str]) -> List[Future]:
+    """
+    Submit uncached names to the Wikidata thread pool.
+
+    Names that are already being fetched join the existing Future instead of
+    being queued again. When WIKIDATA_MAX_PENDING tasks are already queued or
+    running (e.g. while Wikidata is slow), new names are skipped: the request
+    returns them as enrichment_partial instead of growing the backlog.
+
+    Returns:
+        Futures resolving to {normalized name: result}, see _collect_fetches
+    """
+    # Satu SPARQL request per chunk nama (batch), selain itu satu request per tempat
+    size = max(1, config.WIKIDATA_BATCH_SIZE) if config.WIKIDATA_ENRICH_MODE == "batch" else 1
+    pending: Dict[int, Future] = {}
+    submitted = []
+    with _inflight_lock:
+        new, seen = [], set()
+        for name in missing:
+            key = normalize_place_name(name)
+            future = _inflight.get(key)
+            if future is not None:
+                pending[id(future)] = future
+                _fetch_stats["joined"] += 1
+            elif key not in seen:
+                seen.add(key)
+                new.append((name, key))
+
+        for start in range(0, len(new), size):
+            chunk = new[start:start + size]
+            if _fetch_stats["pending"] >= config.WIKIDATA_MAX_PENDING:
+                _fetch_stats["dropped"] += len(new) - start
+                break
+            future = _executor.submit(_fetch_task, [name for name, _ in chunk])
+            keys = [key for _, key in chunk]
+            for key in keys:
+                _inflight[key] = future
+            _fetch_stats["pending"] += 1
+            _fetch_stats["submitted"] += 1
+            pending[id(future)] = future
+            submitted.append((future, keys))
+
+    # Di luar lock: callback bisa langsung jalan jika task sudah selesai
+    for future, keys in submitted:
+        future.add_done_callback(lambda f, keys=keys: _release(f, keys))
+    return list(pending.values())
+
+
+def _collect_fetches(
+    done: Iterable,
+    missing: List[str],
+    resolved: Dict[str, Optional[Dict[str, Any]]]
+) -> None:
+    """Copy finished fetch results into `resolved`, keyed by the names this request asked for."""
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    for future in done:
+        results.update(future.result())
+    for name in missing:
+        key = normalize_place_name(name)
+        if key in results:
+            resolved[name] = results[key]
+
+
+def wikidata_fetch_stats() -> Dict[str, Any]:
+    """Live lookup queue: pending tasks, joined (de-duplicated) names and names dropped at saturation."""
+    with _inflight_lock:
+        return {**_fetch_stats, "in_flight_names": len(_inflight), "max_pending": config.WIKIDATA_MAX_PENDING}
+
+
+def _finish_enrichment(
+    places: List[Dict[str, Any]],
+    max_enrich: int,
+    stored: List[Optional[Dict[str, Any]]],
+    resolved: Dict[str, Optional[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    for i, place in enumerate(places):
+        name = place.get("name") or ""
+        if stored[i] is not None:
+            _apply_external(place, stored[i])
+            place["enrichment_partial"] = False
+        elif i < max_enrich and name in resolved:
+            _apply_external(place, resolved[name])
+            place["enrichment_partial"] = False
+        else:
+            # Tidak di-enrich (di luar max_enrich) atau melewati deadline
+            _apply_external(place, None)
+            place["enrichment_partial"] = i < max_enrich and bool(name)
+
+    return places
+
+
+async def enrich_place_with_wikidata_async(place: Dict[str, Any]) -> Dict[str, Any]:
     """
     Enrich a single place object with Wikidata information.
-    
+
     Args:
         place: Place dictionary containing at least 'name' field
-        
+
     Returns:
         Place dictionary enriched with image, wikidata_entity, and description_id
     """
-    external = fetch_wikidata_image(place.get("name", ""))
-    if external:
-        place["image"] = external.get("image")
-        place["wikidata_entity"] = external.get("wikidata_entity")
-        place["description_id"] = external.get("description_id")
-    else:
-        place["image"] = None
-        place["wikidata_entity"] = None
-        place["description_id"] = None
-    
-    return place
+    return (await enrich_places_with_wikidata_async([place], max_enrich=1))[0]
 
 
-def enrich_places_with_wikidata(places: List[Dict[str, Any]], max_enrich: int = 5) -> List[Dict[str, Any]]:
+async def enrich_places_with_wikidata_async(
+    places: List[Dict[str, Any]],
+    max_enrich: int = 5,
+    deadline: Optional[float] = None
+) -> List[Dict[str, Any]]:
     """
     Enrich multiple place objects with Wikidata information.
     Only enriches the first 'max_enrich' places to avoid slow response times.
-    
+
+    Places carrying fresh Wikidata properties materialized by
+    prefetch_wikidata.py are enriched from those without any lookup.
+    Disk cache lookups run in one batched call off the event loop.
+    Uncached names are resolved on a shared, bounded thread pool - in
+    WIKIDATA_ENRICH_MODE="batch" as one SPARQL request per chunk of
+    WIKIDATA_BATCH_SIZE names, otherwise one request per place - which the
+    event loop awaits. Places whose lookup has not finished when the
+    deadline expires are returned with empty Wikidata fields and
+    `enrichment_partial: True`; the lookup keeps running in the background
+    and lands in the cache for the next request.
+
     Args:
         places: List of place dictionaries
         max_enrich: Maximum number of places to enrich (default: 5)
-        
+        deadline: Total seconds to wait for enrichment (default: WIKIDATA_ENRICH_DEADLINE)
+
     Returns:
         List of places with top results enriched with Wikidata info
     """
-    enriched_places = []
-    
-    for i, place in enumerate(places):
-        if i < max_enrich:
-            # Enrich top results with Wikidata
-            enriched_places.append(enrich_place_with_wikidata(place))
-        else:
-            # Don't enrich remaining results (performance optimization)
-            place["image"] = None
-            place["wikidata_entity"] = None
-            place["description_id"] = None
-            enriched_places.append(place)
-    
-    return enriched_places
+    if deadline is None:
+        deadline = config.WIKIDATA_ENRICH_DEADLINE
+
+    stored, resolved, missing = _start_enrichment(places, max_enrich)
+    if missing:
+        # SQLite read (dan update accessed_at) tidak boleh menahan event loop
+        missing = await asyncio.to_thread(_lookup_disk, missing, resolved)
+    pending = _submit_fetches(missing)
+
+    if pending:
+        done, _ = await asyncio.wait([asyncio.wrap_future(f) for f in pending], timeout=deadline)
+        _collect_fetches(done, missing, resolved)
+
+    return _finish_enrichment(places, max_enrich, stored, resolved)
@@ -0,0 +1,235 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from services.cache import LRUCache, MISSING, normalize_key
+
+
+def normalize_place_name(name: str) -> str:
+    """Normalize a place name into a cache key."""
+    return normalize_key(name)
+
+
+class WikidataCache:
+    """
+    Two-tier cache for Wikidata enrichment results.
+
+    Tier 1 is an in-process LRU so hot places never leave the process.
+    Tier 2 is a SQLite file so the cache survives restarts and is shared
+    between workers on the same host. A cached value of None is a negative
+    result (no match, or a failed lookup) and is served like any other hit.
+    """
+
+    # Hapus entry kadaluarsa / berlebih setiap N kali write, bukan di setiap write
+    PRUNE_EVERY = 100
+    # accessed_at di disk hanya diperbarui jika lebih lama dari ini (detik), supaya
+    # disk hit tidak selalu menjadi write transaction
+    TOUCH_INTERVAL = 3600
+    # Jumlah key per query IN (...) di get_many
+    QUERY_CHUNK = 500
+
+    def __init__(
+        self,
+        path: Optional[str],
+        ttl: int,
+        negative_ttl: int,
+        memory_size: int,
+        disk_size: int,
+    ):
+        """
+        Args:
+            path: SQLite file path (None = memory tier only)
+            ttl: TTL in seconds for positive results
+            negative_ttl: TTL in seconds for "no match" results
+            memory_size: Maximum entries in the in-process LRU
+            disk_size: Maximum entries kept in SQLite
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.disk_size = disk_size
+        self.memory = LRUCache(maxsize=memory_size)
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = self._open(path) if path else None
+
+    def _open(self, path: str) -> Optional[sqlite3.Connection]:
+        try:
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS wikidata_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_wikidata_cache_accessed ON wikidata_cache (accessed_at)"
+            )
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            # Cache disk bukan hal wajib: tetap jalan dengan memory tier saja
+            print(f"Wikidata disk cache disabled ({path}): {e}")
+            return None
+
+    def peek(self, name: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Look up a place name in the memory tier only (never touches SQLite)."""
+        value = self.memory.get(normalize_place_name(name), MISSING)
+        return (False, None) if value is MISSING else (True, value)
+
+    def get_many(self, names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Look up many place names: memory tier first, then one SQLite query for the rest.
+        Blocking; call it off the event loop.
+
+        Returns:
+            Mapping of the names that were found to their value (may be None)
+        """
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        keys: Dict[str, List[str]] = {}
+        for name in names:
+            hit, value = self.peek(name)
+            if hit:
+                found[name] = value
+            else:
+                keys.setdefault(normalize_place_name(name), []).append(name)
+
+        if not keys or self._conn is None:
+            return found
+
+        now = time.time()
+        rows = []
+        with self._lock:
+            try:
+                key_list = list(keys)
+                for start in range(0, len(key_list), self.QUERY_CHUNK):
+                    chunk = key_list[start:start + self.QUERY_CHUNK]
+                    rows += self._conn.execute(
+                        "SELECT key, value, expires_at, accessed_at FROM wikidata_cache "
+                        f"WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                        (*chunk, now),
+                    ).fetchall()
+                stale = [(now, row[0]) for row in rows if now - row[3] >= self.TOUCH_INTERVAL]
+                if stale:
+                    self._conn.executemany("UPDATE wikidata_cache SET accessed_at = ? WHERE key = ?", stale)
+                    self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+        self.disk_hits += len(rows)
+        self.disk_misses += len(keys) - len(rows)
+        for key, payload, expires_at, _ in rows:
+            value = json.loads(payload) if payload is not None else None
+            self.memory.set(key, value, ttl=expires_at - now)
+            for name in keys[key]:
+                found[name] = value
+        return found
+
+    def set(self, name: str, value: Optional[Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """
+        Store a lookup result. None values are cached with the negative TTL
+        unless an explicit ttl is given.
+        """
+        key = normalize_place_name(name)
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+
+        self.memory.set(key, value, ttl=ttl)
+
+        if self._conn is None:
+            return
+
+        now = time.time()
+        payload = json.dumps(value) if value is not None else None
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO wikidata_cache (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, payload, now + ttl, now),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def _prune(self, now: float) -> None:
+        """Drop expired rows, then evict least-recently-accessed rows above disk_size."""
+        self._conn.execute("DELETE FROM wikidata_cache WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            """
+            DELETE FROM wikidata_cache WHERE key IN (
+                SELECT key FROM wikidata_cache
+                ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.disk_size,),
+        )
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self._conn is None:
+            return
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM wikidata_cache")
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        disk_size = None
+        if self._conn is not None:
+            with self._lock:
+                try:
+                    disk_size = self._conn.execute("SELECT COUNT(*) FROM wikidata_cache").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "enabled": self._conn is not None,
+                "size": disk_size,
+                "maxsize": self.disk_size,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+            },
+        }
+
+
+_cache_instance: Optional[WikidataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_wikidata_cache() -> Optional[WikidataCache]:
+    """
+    Get atau create singleton WikidataCache sesuai konfigurasi.
+    Returns None when caching is disabled.
+    """
+    global _cache_instance
+    if not config.WIKIDATA_CACHE_ENABLED:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = WikidataCache(
+                    path=config.WIKIDATA_CACHE_PATH or None,
+                    ttl=config.WIKIDATA_CACHE_TTL,
+                    negative_ttl=config.WIKIDATA_CACHE_NEGATIVE_TTL,
+                    memory_size=config.WIKIDATA_CACHE_MEMORY_SIZE,
+                    disk_size=config.WIKIDATA_CACHE_DISK_SIZE,
+                )
+    return _cache_instance